@@ -1,10 +1,14 @@
 import os
 import smtplib
+from datetime import datetime
 from email.message import EmailMessage
+from typing import Iterable, Optional
 
 from sqlalchemy.orm import Session
 
 from app import models
+from app.events import EVENT_ALERT, MAX_EVENT_ITEMS, publish
+from app.rules import load_rule_set
 
 try:
     from dotenv import load_dotenv
@@ -15,6 +19,7 @@ except Exception:
 
 ALERT_TYPE_NEGATIVE_REVIEW = "negative_review"
 ALERT_RECIPIENTS = ["kyle@fireflysolar.ca", "c.anderson@fireflysolar.ca"]
+ALERT_SCAN_BATCH_SIZE = 500
 
 
 def get_or_create_negative_rule(db: Session, location_id: int) -> models.AlertRule:
@@ -40,17 +45,16 @@ def get_or_create_negative_rule(db: Session, location_id: int) -> models.AlertRu
     return rule
 
 
-def has_existing_alert(db: Session, review_id: int, alert_type: str) -> bool:
-    existing = (
-        db.query(models.AlertLog)
-        .join(models.AlertRule, models.AlertLog.alert_rule_id == models.AlertRule.id)
-        .filter(
-            models.AlertLog.review_id == review_id,
-            models.AlertRule.name == alert_type,
-        )
-        .first()
-    )
-    return existing is not None
+def ensure_default_rules(db: Session) -> None:
+    location_ids = {row.id for row in db.query(models.Location.id).all()}
+    covered = {
+        row.location_id
+        for row in db.query(models.AlertRule.location_id)
+        .filter(models.AlertRule.name == ALERT_TYPE_NEGATIVE_REVIEW)
+        .all()
+    }
+    for location_id in sorted(location_ids - covered):
+        get_or_create_negative_rule(db, location_id)
 
 
 def smtp_config() -> dict[str, str]:
@@ -68,11 +72,20 @@ def smtp_is_configured(config: dict[str, str]) -> bool:
     return bool(config["host"] and config["port"] and config["from"])
 
 
-def send_or_log_alert(review: models.Review, location: models.Location) -> str:
+def send_or_log_alert(
+    review: models.Review,
+    location: models.Location,
+    rule_name: str = ALERT_TYPE_NEGATIVE_REVIEW,
+) -> str:
     config = smtp_config()
-    subject = f"Negative Review Alert: {review.reviewer_name} ({review.rating})"
+    if rule_name == ALERT_TYPE_NEGATIVE_REVIEW:
+        subject = f"Negative Review Alert: {review.reviewer_name} ({review.rating})"
+        heading = "Negative review detected"
+    else:
+        subject = f"Review Alert [{rule_name}]: {review.reviewer_name} ({review.rating})"
+        heading = f"Alert rule matched: {rule_name}"
     body = (
-        "Negative review detected\n"
+        f"{heading}\n"
         f"Reviewer: {review.reviewer_name}\n"
         f"Location: {location.name}\n"
         f"Rating: {review.rating}\n"
@@ -104,29 +117,87 @@ def send_or_log_alert(review: models.Review, location: models.Location) -> str:
     return "logged"
 
 
-def run_negative_review_scan(db: Session) -> int:
-    created_alerts = 0
-    negative_reviews = (
-        db.query(models.Review, models.Location)
-        .join(models.Location, models.Review.location_id == models.Location.id)
-        .filter(models.Review.rating <= 2)
-        .all()
+def run_negative_review_scan(db: Session, review_ids: Optional[Iterable[int]] = None) -> int:
+    # Despite the name, this evaluates every enabled alert rule; negative_review is just the default rule.
+    ensure_default_rules(db)
+    rule_set = load_rule_set(db)
+    if not rule_set.rules:
+        db.commit()
+        return 0
+
+    candidate_query = db.query(models.Review, models.Location).join(
+        models.Location, models.Review.location_id == models.Location.id
     )
+    sql_filter = rule_set.sql_filter()
+    if sql_filter is not None:
+        candidate_query = candidate_query.filter(sql_filter)
+    if review_ids is not None:
+        review_ids = list(review_ids)
+        if not review_ids:
+            db.commit()
+            return 0
+        candidate_query = candidate_query.filter(models.Review.id.in_(review_ids))
+    candidates = candidate_query.order_by(models.Review.id).all()
 
-    for review, location in negative_reviews:
-        if has_existing_alert(db, review.id, ALERT_TYPE_NEGATIVE_REVIEW):
-            continue
-
-        rule = get_or_create_negative_rule(db, review.location_id)
-        status = send_or_log_alert(review, location)
-        db.add(
-            models.AlertLog(
-                alert_rule_id=rule.id,
-                review_id=review.id,
-                status=status,
+    created_alerts = 0
+    published_alerts: list[dict[str, object]] = []
+    for start in range(0, len(candidates), ALERT_SCAN_BATCH_SIZE):
+        batch = candidates[start : start + ALERT_SCAN_BATCH_SIZE]
+        batch_ids = [review.id for review, _ in batch]
+        existing = {
+            (row.review_id, row.alert_rule_id)
+            for row in db.query(models.AlertLog.review_id, models.AlertLog.alert_rule_id)
+            .filter(models.AlertLog.review_id.in_(batch_ids))
+            .union_all(
+                db.query(models.ArchivedAlert.review_id, models.ArchivedAlert.alert_rule_id).filter(
+                    models.ArchivedAlert.review_id.in_(batch_ids)
+                )
             )
-        )
-        created_alerts += 1
+            .all()
+        }
+        mentioned: dict[int, set[int]] = {}
+        if rule_set.needs_mentions:
+            for row in (
+                db.query(models.EmployeeMention.review_id, models.EmployeeMention.employee_id)
+                .filter(models.EmployeeMention.review_id.in_(batch_ids))
+                .filter(models.EmployeeMention.employee_id.is_not(None))
+                .all()
+            ):
+                mentioned.setdefault(row.review_id, set()).add(row.employee_id)
+
+        for review, location in batch:
+            for rule in rule_set.evaluate(review, mentioned.get(review.id, set())):
+                if (review.id, rule.id) in existing:
+                    continue
+                status = send_or_log_alert(review, location, rule.name)
+                triggered_at = datetime.utcnow()
+                db.add(
+                    models.AlertLog(
+                        alert_rule_id=rule.id,
+                        review_id=review.id,
+                        location_id=review.location_id,
+                        alert_type=rule.name,
+                        triggered_at=triggered_at,
+                        status=status,
+                    )
+                )
+                existing.add((review.id, rule.id))
+                created_alerts += 1
+                if len(published_alerts) < MAX_EVENT_ITEMS:
+                    published_alerts.append(
+                        {
+                            "sent_at": triggered_at.strftime("%Y-%m-%d %H:%M:%S"),
+                            "review_id": review.id,
+                            "location_id": review.location_id,
+                            "reviewer_name": review.reviewer_name,
+                            "location": location.name,
+                            "rating": review.rating,
+                            "alert_type": rule.name,
+                            "status": status,
+                        }
+                    )
 
     db.commit()
+    if created_alerts:
+        publish(EVENT_ALERT, {"created": created_alerts, "alerts": published_alerts})
     return created_alerts
@@ -0,0 +1,150 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+from app.synthetic_data import SCALES, write_dataset
+
+HANDLER_PATHS = ["/dashboard", "/employees", "/reviews"]
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def timed(func: Callable[[], object], repeat: int = 1) -> dict[str, object]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        # Scans and imports print per row; keep that out of the measurement.
+        with contextlib.redirect_stdout(io.StringIO()):
+            func()
+        samples.append(round(time.perf_counter() - started, 4))
+    return {
+        "seconds": samples,
+        "min": min(samples),
+        "median": round(statistics.median(samples), 4),
+        "max": max(samples),
+    }
+
+
+def run_benchmarks(workdir: Path, reviews: int, employees: int, locations: int, repeat: int, seed: int):
+    db_path = workdir / "bench.db"
+    if db_path.exists():
+        db_path.unlink()
+    if "app.db" in sys.modules:
+        raise RuntimeError("app.db was imported before the benchmark database was configured.")
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+
+    # Imported after DATABASE_URL is set so the engine points at the scratch database.
+    from fastapi.testclient import TestClient
+
+    from app import alerts
+    from app.alerts import run_negative_review_scan
+    from app.db import SessionLocal
+    from app.import_data import import_employees, import_reviews
+    from app.main import app
+    from app.mentions import run_employee_mention_detection
+
+    # app.alerts loads .env, so with SMTP configured the scan would email every synthetic negative
+    # review and time the SMTP round-trips. Alerts are recorded as logged without sending or printing.
+    alerts.send_or_log_alert = lambda review, location, rule_name=alerts.ALERT_TYPE_NEGATIVE_REVIEW: "logged"
+
+    reviews_path, employees_path = write_dataset(workdir, reviews, employees, locations, seed=seed)
+
+    def with_session(func: Callable) -> Callable[[], object]:
+        def run() -> object:
+            db = SessionLocal()
+            try:
+                return func(db)
+            finally:
+                db.close()
+
+        return run
+
+    results: dict[str, dict[str, object]] = {}
+    results["import_employees"] = timed(lambda: import_employees(employees_path))
+    results["import_reviews"] = timed(lambda: import_reviews(reviews_path))
+    results["run_employee_mention_detection"] = timed(with_session(run_employee_mention_detection))
+    results["run_negative_review_scan"] = timed(with_session(run_negative_review_scan))
+
+    # No context manager: startup hooks (and the background scheduler) stay off during timing.
+    client = TestClient(app)
+    for path in HANDLER_PATHS:
+
+        def get(path: str = path) -> None:
+            response = client.get(path)
+            response.raise_for_status()
+
+        results[f"GET {path}"] = timed(get, repeat=repeat)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time the import, scan and page hot paths on synthetic data.")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--reviews", type=int, help="Override the preset review count.")
+    parser.add_argument("--employees", type=int, help="Override the preset employee count.")
+    parser.add_argument("--locations", type=int, help="Override the preset location count.")
+    parser.add_argument("--repeat", type=int, default=3, help="Requests per page handler.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workdir", help="Where to write the dataset and scratch DB (default: temp dir).")
+    parser.add_argument("--output", default="bench_output.json")
+    args = parser.parse_args()
+
+    reviews, employees, locations = SCALES[args.scale]
+    params = {
+        "scale": args.scale,
+        "reviews": args.reviews or reviews,
+        "employees": args.employees or employees,
+        "locations": args.locations or locations,
+        "repeat": args.repeat,
+        "seed": args.seed,
+    }
+    with contextlib.ExitStack() as stack:
+        if args.workdir:
+            workdir = Path(args.workdir)
+            workdir.mkdir(parents=True, exist_ok=True)
+        else:
+            workdir = Path(stack.enter_context(tempfile.TemporaryDirectory(prefix="review-bench-")))
+        results = run_benchmarks(
+            workdir,
+            reviews=params["reviews"],
+            employees=params["employees"],
+            locations=params["locations"],
+            repeat=args.repeat,
+            seed=args.seed,
+        )
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.utcnow().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "params": params,
+        "results": results,
+    }
+    Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    for name, result in results.items():
+        print(f"{name:36} median={result['median']:.4f}s")
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
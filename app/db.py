@@ -1,7 +1,18 @@
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import declarative_base, sessionmaker
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterator, Optional, TypeVar
 
-DATABASE_URL = "sqlite:///./app.db"
+from sqlalchemy import Table, create_engine, event, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
+from sqlalchemy.schema import CreateTable
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./app.db")
 
 engine = create_engine(
     DATABASE_URL,
@@ -9,9 +20,17 @@ engine = create_engine(
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
+T = TypeVar("T")
+
+# Optional per-location sharding: each location's reviews, employees, mentions, alerts and pipeline
+# state live in their own SQLite file, so writers for different locations never share a lock.
+# The primary database keeps the locations catalog.
+SHARDING_ENABLED = os.getenv("SHARD_BY_LOCATION", "").strip().lower() in {"1", "true", "yes"}
+SHARD_DIR = Path(os.getenv("SHARD_DIR", "./shards"))
+SHARD_WORKERS = int(os.getenv("SHARD_WORKERS", "4") or 4)
 
 
-def ensure_employee_mentions_schema() -> None:
+def ensure_employee_mentions_schema(bind: Optional[Engine] = None) -> None:
     required_columns = {
         "id",
         "review_id",
@@ -22,7 +41,7 @@ def ensure_employee_mentions_schema() -> None:
         "mention_text",
         "created_at",
     }
-    with engine.begin() as conn:
+    with (bind or engine).begin() as conn:
         table_info = conn.execute(text("PRAGMA table_info(employee_mentions)")).mappings().all()
         if not table_info:
             return
@@ -79,6 +98,287 @@ def ensure_employee_mentions_schema() -> None:
         )
 
 
+def ensure_alert_log_location(bind: Optional[Engine] = None) -> None:
+    with (bind or engine).begin() as conn:
+        table_info = conn.execute(text("PRAGMA table_info(alert_log)")).mappings().all()
+        if not table_info or "location_id" in {row["name"] for row in table_info}:
+            return
+        conn.execute(text("ALTER TABLE alert_log ADD COLUMN location_id INTEGER REFERENCES locations(id)"))
+        conn.execute(
+            text(
+                "UPDATE alert_log SET location_id = "
+                "(SELECT reviews.location_id FROM reviews WHERE reviews.id = alert_log.review_id)"
+            )
+        )
+
+
+def ensure_alert_log_alert_type(bind: Optional[Engine] = None) -> None:
+    with (bind or engine).begin() as conn:
+        table_info = conn.execute(text("PRAGMA table_info(alert_log)")).mappings().all()
+        if not table_info or "alert_type" in {row["name"] for row in table_info}:
+            return
+        conn.execute(text("ALTER TABLE alert_log ADD COLUMN alert_type VARCHAR(255)"))
+        conn.execute(
+            text(
+                "UPDATE alert_log SET alert_type = "
+                "(SELECT alert_rules.name FROM alert_rules WHERE alert_rules.id = alert_log.alert_rule_id)"
+            )
+        )
+
+
+def ensure_review_events_autoincrement(bind: Optional[Engine] = None) -> None:
+    # Databases created before review_events used AUTOINCREMENT are rebuilt once. The sequence starts
+    # past both the highest existing id and every pipeline cursor, so no new event hides behind one.
+    table = Base.metadata.tables["review_events"]
+    with (bind or engine).connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        sql = conn.execute(
+            text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'review_events'")
+        ).scalar()
+        conn.commit()
+        if not sql or "AUTOINCREMENT" in sql.upper():
+            return
+        with conn.begin():
+            # pysqlite does not open a transaction before DDL, so it is opened here.
+            conn.exec_driver_sql("BEGIN")
+            for index in table.indexes:
+                conn.exec_driver_sql(f"DROP INDEX IF EXISTS {index.name}")
+            conn.exec_driver_sql("ALTER TABLE review_events RENAME TO review_events_old")
+            conn.execute(CreateTable(table))
+            conn.exec_driver_sql(
+                "INSERT INTO review_events (id, review_id, event_type, created_at) "
+                "SELECT id, review_id, event_type, created_at FROM review_events_old"
+            )
+            floor = conn.execute(
+                text(
+                    "SELECT MAX(COALESCE((SELECT MAX(id) FROM review_events_old), 0), "
+                    "COALESCE((SELECT MAX(last_event_id) FROM pipeline_cursors), 0))"
+                )
+            ).scalar()
+            conn.exec_driver_sql("DELETE FROM sqlite_sequence WHERE name = 'review_events'")
+            conn.execute(
+                text("INSERT INTO sqlite_sequence (name, seq) VALUES ('review_events', :seq)"), {"seq": floor}
+            )
+            conn.exec_driver_sql("DROP TABLE review_events_old")
+
+
+def ensure_indexes(bind: Optional[Engine] = None) -> None:
+    # create_all skips tables that already exist, so indexes added to a model later are created here.
+    with (bind or engine).begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=conn, checkfirst=True)
+
+
+def rebuild_tables(conn: Connection, tables: list[Table]) -> None:
+    # Drop and recreate without secondary indexes so a bulk load skips index maintenance.
+    ordered = [table for table in Base.metadata.sorted_tables if table in tables]
+    for table in reversed(ordered):
+        table.drop(bind=conn, checkfirst=True)
+    for table in ordered:
+        conn.execute(CreateTable(table))
+
+
+def create_deferred_indexes(conn: Connection, tables: list[Table]) -> None:
+    for table in tables:
+        for index in table.indexes:
+            index.create(bind=conn, checkfirst=True)
+
+
+# Per-table write counters read by the conditional-GET page handlers. Every write statement on a
+# tracked table is noted on its connection, and the counters are bumped once when that transaction
+# commits. This covers ORM, Core and text() writes, including the importer CLI in another process.
+CHANGE_TRACKED_TABLES = [
+    "locations",
+    "reviews",
+    "employees",
+    "employee_mentions",
+    "alert_rules",
+    "alert_log",
+]
+WRITE_STATEMENT_RE = re.compile(
+    r"^\s*(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM)\s+[\"`\[]?(\w+)",
+    re.IGNORECASE,
+)
+BUMP_VERSIONS_SQL = (
+    "UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE table_name IN ({})"
+)
+
+
+PRIMARY_BUMP_ATTEMPTS = 3
+_pending_primary_bumps: set[str] = set()
+_pending_primary_lock = threading.Lock()
+
+
+def mirror_table_versions(primary: Engine, changed: set[str]) -> bool:
+    # Retries a busy primary; tables it still could not bump are kept and retried by the next mirror
+    # or by flush_primary_bumps, which the conditional-GET check calls before trusting the counters.
+    with _pending_primary_lock:
+        tables = sorted(changed | _pending_primary_bumps)
+        _pending_primary_bumps.clear()
+    if not tables:
+        return True
+    bump_sql = BUMP_VERSIONS_SQL.format(", ".join("?" for _ in tables))
+    for attempt in range(PRIMARY_BUMP_ATTEMPTS):
+        try:
+            with primary.begin() as conn:
+                conn.exec_driver_sql(bump_sql, tuple(tables))
+            return True
+        except SQLAlchemyError as exc:
+            error = exc
+            if attempt + 1 < PRIMARY_BUMP_ATTEMPTS:
+                time.sleep(0.05 * (attempt + 1))
+    with _pending_primary_lock:
+        _pending_primary_bumps.update(tables)
+    print(f"Could not bump primary change counters for {', '.join(tables)}: {error}")
+    return False
+
+
+def flush_primary_bumps() -> bool:
+    # False while some shard write is still missing from the primary's counters.
+    with _pending_primary_lock:
+        if not _pending_primary_bumps:
+            return True
+    return mirror_table_versions(engine, set())
+
+
+def track_table_changes(bind: Engine, mirror_to: Optional[Engine] = None) -> None:
+    # mirror_to: shards also bump the primary database's counters, so a conditional GET reads one
+    # table_versions table instead of asking every shard.
+    @event.listens_for(bind, "before_cursor_execute")
+    def note_write(conn, cursor, statement, parameters, context, executemany) -> None:
+        match = WRITE_STATEMENT_RE.match(statement)
+        if match and match.group(1) in CHANGE_TRACKED_TABLES:
+            conn.info.setdefault("changed_tables", set()).add(match.group(1))
+
+    @event.listens_for(bind, "commit")
+    def bump_on_commit(conn) -> None:
+        changed = conn.info.pop("changed_tables", None)
+        if not changed:
+            return
+        # Straight on the DBAPI cursor: the transaction is still open and is committed right after this.
+        cursor = conn.connection.dbapi_connection.cursor()
+        bump_sql = BUMP_VERSIONS_SQL.format(", ".join("?" for _ in changed))
+        try:
+            cursor.execute(bump_sql, sorted(changed))
+        finally:
+            cursor.close()
+        if mirror_to is not None:
+            mirror_table_versions(mirror_to, changed)
+
+    @event.listens_for(bind, "rollback")
+    def forget_writes(conn) -> None:
+        conn.info.pop("changed_tables", None)
+
+
+track_table_changes(engine)
+
+
+def ensure_change_counters(bind: Optional[Engine] = None) -> None:
+    with (bind or engine).begin() as conn:
+        conn.execute(
+            text(
+                """
+                CREATE TABLE IF NOT EXISTS table_versions (
+                    table_name VARCHAR(64) PRIMARY KEY,
+                    version INTEGER NOT NULL DEFAULT 0,
+                    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+                )
+                """
+            )
+        )
+        for table_name in CHANGE_TRACKED_TABLES:
+            conn.execute(
+                text(
+                    "INSERT OR IGNORE INTO table_versions (table_name, version, updated_at) "
+                    "VALUES (:name, 0, CURRENT_TIMESTAMP)"
+                ),
+                {"name": table_name},
+            )
+            # Earlier versions bumped the counters from per-row triggers.
+            for operation in ("insert", "update", "delete"):
+                conn.execute(text(f"DROP TRIGGER IF EXISTS trg_{table_name}_{operation}_version"))
+
+
+def bump_table_versions(conn: Connection, table_names: list[str]) -> None:
+    # For changes the statement tracking does not see, e.g. tables dropped by a bulk reload. The
+    # counters are bumped (and mirrored) with everything else when the transaction commits.
+    conn.info.setdefault("changed_tables", set()).update(
+        table_name for table_name in table_names if table_name in CHANGE_TRACKED_TABLES
+    )
+
+
+def init_db(bind: Optional[Engine] = None) -> None:
+    Base.metadata.create_all(bind=bind or engine)
+    ensure_employee_mentions_schema(bind)
+    ensure_alert_log_location(bind)
+    ensure_alert_log_alert_type(bind)
+    ensure_review_events_autoincrement(bind)
+    ensure_indexes(bind)
+    ensure_change_counters(bind)
+
+
+_shard_lock = threading.Lock()
+_shard_sessions: dict[int, sessionmaker] = {}
+
+
+def shard_url(location_id: int) -> str:
+    return f"sqlite:///{SHARD_DIR / f'location_{location_id}.db'}"
+
+
+def get_shard_sessionmaker(location_id: int) -> sessionmaker:
+    with _shard_lock:
+        factory = _shard_sessions.get(location_id)
+        if factory is None:
+            SHARD_DIR.mkdir(parents=True, exist_ok=True)
+            shard_engine = create_engine(shard_url(location_id), connect_args={"check_same_thread": False})
+            track_table_changes(shard_engine, mirror_to=engine)
+            init_db(shard_engine)
+            factory = sessionmaker(autocommit=False, autoflush=False, bind=shard_engine)
+            _shard_sessions[location_id] = factory
+        return factory
+
+
+def shard_location_ids() -> list[int]:
+    with engine.connect() as conn:
+        return [row[0] for row in conn.execute(text("SELECT id FROM locations ORDER BY id"))]
+
+
+def session_for_location(location_id: int) -> Session:
+    if SHARDING_ENABLED:
+        return get_shard_sessionmaker(location_id)()
+    return SessionLocal()
+
+
+def iter_shard_sessions() -> Iterator[Session]:
+    # One session per shard when sharding is on, otherwise just the primary database.
+    if not SHARDING_ENABLED:
+        yield SessionLocal()
+        return
+    for location_id in shard_location_ids():
+        yield get_shard_sessionmaker(location_id)()
+
+
+def map_per_shard(func: Callable[[Session], T]) -> list[T]:
+    def run(db: Session) -> T:
+        try:
+            return func(db)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    sessions = list(iter_shard_sessions())
+    if len(sessions) == 1:
+        return [run(sessions[0])]
+    with ThreadPoolExecutor(max_workers=SHARD_WORKERS, thread_name_prefix="shard") as pool:
+        return list(pool.map(run, sessions))
+
+
+def run_per_shard(func: Callable[[Session], int]) -> int:
+    return sum(result or 0 for result in map_per_shard(func))
+
+
 def get_db():
     db = SessionLocal()
     try:
@@ -0,0 +1,73 @@
+import asyncio
+import json
+import threading
+from typing import Optional
+
+SUBSCRIBER_QUEUE_SIZE = 100
+# Large scans report a count plus at most this many IDs or rows per event.
+MAX_EVENT_ITEMS = 100
+
+EVENT_REVIEW = "review"
+EVENT_MENTION = "mention"
+EVENT_ALERT = "alert"
+EVENT_DAILY_COUNTS = "daily_counts"
+
+
+def format_sse(event_type: str, data: dict[str, object]) -> str:
+    return f"event: {event_type}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+# Fans events out to every open /events stream. Publishers are the scans and the import pipeline,
+# which run on worker threads, so publish() hands each message to the event loop thread-safely.
+class EventHub:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._subscribers: set[asyncio.Queue] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._loop = asyncio.get_running_loop()
+            self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        with self._lock:
+            self._subscribers.discard(queue)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+    def publish(self, event_type: str, data: dict[str, object]) -> None:
+        with self._lock:
+            loop = self._loop
+            if loop is None or not self._subscribers or loop.is_closed():
+                return
+        message = format_sse(event_type, data)
+        try:
+            loop.call_soon_threadsafe(self._fan_out, message)
+        except RuntimeError:
+            pass
+
+    def _fan_out(self, message: str) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for queue in subscribers:
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # A stalled client loses events rather than holding memory; it catches up on reload.
+                pass
+
+
+hub = EventHub()
+
+
+def publish(event_type: str, data: dict[str, object]) -> None:
+    hub.publish(event_type, data)
+
+
+def has_subscribers() -> bool:
+    return hub.subscriber_count() > 0
@@ -0,0 +1,52 @@
+import argparse
+import sys
+from datetime import date
+from pathlib import Path
+from typing import Optional
+
+from app.exports import EXPORT_FORMATS, stream_review_export
+
+
+def export_reviews(
+    output: Optional[Path],
+    export_format: str = "csv",
+    location_id: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> None:
+    chunks = stream_review_export(
+        export_format,
+        location_id=location_id,
+        start_date=start_date,
+        end_date=end_date,
+    )
+    if output is None:
+        for chunk in chunks:
+            sys.stdout.write(chunk)
+        return
+    with output.open("w", encoding="utf-8", newline="") as f:
+        for chunk in chunks:
+            f.write(chunk)
+    print(f"Exported reviews to {output}", file=sys.stderr)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export reviews with their mentions and alert status.")
+    parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="csv")
+    parser.add_argument("--location-id", type=int)
+    parser.add_argument("--start-date", type=date.fromisoformat, help="YYYY-MM-DD, inclusive.")
+    parser.add_argument("--end-date", type=date.fromisoformat, help="YYYY-MM-DD, inclusive.")
+    parser.add_argument("--output", help="File to write (default: stdout).")
+    args = parser.parse_args()
+
+    export_reviews(
+        Path(args.output) if args.output else None,
+        export_format=args.format,
+        location_id=args.location_id,
+        start_date=args.start_date,
+        end_date=args.end_date,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+import csv
+import io
+import json
+from datetime import date, datetime, time, timedelta
+from typing import Iterator, Optional
+
+from sqlalchemy import func, literal, select
+from sqlalchemy.orm import Session
+
+from app import models
+from app.db import SHARDING_ENABLED, iter_shard_sessions, session_for_location, shard_location_ids
+
+EXPORT_FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+EXPORT_BATCH_SIZE = 1000
+EXPORT_COLUMNS = [
+    "review_id",
+    "google_review_id",
+    "location_id",
+    "location_name",
+    "reviewer_name",
+    "rating",
+    "review_date",
+    "created_at",
+    "review_text",
+    "mentioned_employees",
+    "ambiguous_mention",
+    "alerts",
+]
+
+
+def parse_date_param(value: Optional[str]) -> Optional[date]:
+    # Blank means no bound; anything else must be YYYY-MM-DD (ValueError), never a silent full export.
+    value = (value or "").strip()
+    if not value:
+        return None
+    return date.fromisoformat(value)
+
+
+def review_export_query(
+    location_id: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+):
+    mention_names = (
+        select(func.group_concat(models.Employee.full_name, "; "))
+        .select_from(models.EmployeeMention)
+        .join(models.Employee, models.EmployeeMention.employee_id == models.Employee.id)
+        .where(models.EmployeeMention.review_id == models.Review.id)
+        .scalar_subquery()
+    )
+    ambiguous = (
+        select(func.count(models.EmployeeMention.id))
+        .where(models.EmployeeMention.review_id == models.Review.id)
+        .where(models.EmployeeMention.ambiguity_flag.is_(True))
+        .scalar_subquery()
+    )
+    alerts = (
+        select(func.group_concat(models.AlertRule.name + literal(":") + models.AlertLog.status, "; "))
+        .select_from(models.AlertLog)
+        .join(models.AlertRule, models.AlertLog.alert_rule_id == models.AlertRule.id)
+        .where(models.AlertLog.review_id == models.Review.id)
+        .scalar_subquery()
+    )
+    query = (
+        select(
+            models.Review.id.label("review_id"),
+            models.Review.google_review_id,
+            models.Review.location_id,
+            models.Location.name.label("location_name"),
+            models.Review.reviewer_name,
+            models.Review.rating,
+            models.Review.review_date,
+            models.Review.created_at,
+            models.Review.review_text,
+            mention_names.label("mentioned_employees"),
+            ambiguous.label("ambiguous_mention"),
+            alerts.label("alerts"),
+        )
+        .join(models.Location, models.Review.location_id == models.Location.id)
+        .order_by(models.Review.id.asc())
+    )
+    if location_id is not None:
+        query = query.where(models.Review.location_id == location_id)
+    if start_date is not None:
+        query = query.where(models.Review.created_at >= datetime.combine(start_date, time.min))
+    if end_date is not None:
+        query = query.where(models.Review.created_at < datetime.combine(end_date + timedelta(days=1), time.min))
+    return query
+
+
+def iter_review_rows(db: Session, **filters) -> Iterator[dict[str, object]]:
+    # Keyset pages on Review.id, each read in its own short transaction. Holding one cursor open for
+    # the whole download would keep SQLite's read lock and block every writer behind a slow client.
+    query = review_export_query(**filters)
+    last_id = 0
+    while True:
+        rows = db.execute(query.where(models.Review.id > last_id).limit(EXPORT_BATCH_SIZE)).mappings().all()
+        db.commit()
+        if not rows:
+            return
+        last_id = rows[-1]["review_id"]
+        for row in rows:
+            record = dict(row)
+            record["ambiguous_mention"] = bool(record["ambiguous_mention"])
+            for key in ("review_date", "created_at"):
+                if record[key] is not None:
+                    record[key] = record[key].isoformat()
+            yield record
+
+
+def iter_csv(rows: Iterator[dict[str, object]]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    for index, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if index % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def iter_ndjson(rows: Iterator[dict[str, object]]) -> Iterator[str]:
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(row, ensure_ascii=False))
+        if len(lines) == EXPORT_BATCH_SIZE:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def export_sessions(location_id: Optional[int]) -> Iterator[Session]:
+    # Shards are read one after another, so a sharded export comes out grouped by location.
+    if SHARDING_ENABLED and location_id is not None:
+        if location_id in shard_location_ids():
+            yield session_for_location(location_id)
+        return
+    yield from iter_shard_sessions()
+
+
+def stream_review_export(export_format: str, **filters) -> Iterator[str]:
+    def rows() -> Iterator[dict[str, object]]:
+        for db in export_sessions(filters.get("location_id")):
+            try:
+                yield from iter_review_rows(db, **filters)
+            finally:
+                db.close()
+
+    yield from iter_csv(rows()) if export_format == "csv" else iter_ndjson(rows())
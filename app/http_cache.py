@@ -0,0 +1,81 @@
+import hashlib
+import uuid
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from pathlib import Path
+from typing import Iterable, Optional
+
+from fastapi import Request, Response
+from sqlalchemy.orm import Session
+
+from app import models
+from app.db import flush_primary_bumps
+
+TEMPLATE_DIR = Path(__file__).parent / "templates"
+
+
+def template_fingerprint() -> str:
+    # Deploying new templates must invalidate cached pages even when no data changed.
+    digest = hashlib.sha1()
+    for path in sorted(TEMPLATE_DIR.glob("**/*.html")):
+        digest.update(path.name.encode())
+        digest.update(str(path.stat().st_mtime_ns).encode())
+    return digest.hexdigest()[:12]
+
+
+TEMPLATE_FINGERPRINT = template_fingerprint()
+
+
+class PageVersion:
+    def __init__(self, etag: str, last_modified: Optional[datetime]) -> None:
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def headers(self) -> dict[str, str]:
+        headers = {"ETag": self.etag, "Cache-Control": "no-cache"}
+        if self.last_modified is not None:
+            headers["Last-Modified"] = format_datetime(self.last_modified, usegmt=True)
+        return headers
+
+
+def read_table_versions(db: Session, tables: list[str]) -> list:
+    return (
+        db.query(models.TableVersion.table_name, models.TableVersion.version, models.TableVersion.updated_at)
+        .filter(models.TableVersion.table_name.in_(tables))
+        .all()
+    )
+
+
+def page_version(db: Session, request: Request, tables: Iterable[str]) -> PageVersion:
+    tables = sorted(tables)
+    # Shard writes are mirrored into the primary database's counters, so this is one primary-key read.
+    # Retried first, so a shard write whose mirror failed earlier is counted in this read.
+    in_sync = flush_primary_bumps()
+    rows = read_table_versions(db, tables)
+    versions = {row.table_name: row.version for row in rows}
+    parts = [TEMPLATE_FINGERPRINT, request.url.path, str(request.url.query)]
+    if not in_sync:
+        # A shard write is still missing from these counters; a one-off ETag keeps clients from a stale 304.
+        parts.append(uuid.uuid4().hex)
+    key = "|".join(parts + [f"{table}={versions.get(table, 0)}" for table in tables])
+    updated = [row.updated_at for row in rows if row.updated_at is not None]
+    last_modified = max(updated).replace(tzinfo=timezone.utc, microsecond=0) if updated else None
+    return PageVersion(f'W/"{hashlib.sha1(key.encode()).hexdigest()[:20]}"', last_modified)
+
+
+def is_not_modified(request: Request, version: PageVersion) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        candidates = {tag.strip() for tag in if_none_match.split(",")}
+        return "*" in candidates or version.etag in candidates
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and version.last_modified is not None:
+        try:
+            return version.last_modified <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def not_modified_response(version: PageVersion) -> Response:
+    return Response(status_code=304, headers=version.headers())
@@ -1,11 +1,26 @@
 import argparse
 import csv
 import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
 
+from sqlalchemy import func, insert, text
+
 from app import models  # noqa: F401
-from app.db import Base, SessionLocal, engine
+from app.db import (
+    SHARD_WORKERS,
+    SHARDING_ENABLED,
+    SessionLocal,
+    bump_table_versions,
+    create_deferred_indexes,
+    init_db,
+    rebuild_tables,
+    run_per_shard,
+    session_for_location,
+    shard_location_ids,
+)
+from app.pipeline import EVENT_REVIEW_CREATED, EVENT_REVIEW_UPDATED, emit_review_events
 
 
 def parse_dt(value: str) -> datetime:
@@ -33,96 +48,303 @@ def ensure_location(db, location_id: int) -> None:
     db.flush()
 
 
-def import_reviews(path: Path, reset: bool = False) -> None:
-    rows = json.loads(path.read_text(encoding="utf-8"))
+def row_location_id(row: dict) -> int:
+    return int(str(row.get("location_id") or "").strip() or 1)
+
+
+def run_per_location(rows: list[dict], func, all_shards: bool = False) -> list[tuple[int, ...]]:
+    # Without sharding the whole file loads into the primary DB in file order.
+    if not SHARDING_ENABLED:
+        return [run_in_session(SessionLocal(), func, rows)]
+    groups: dict[int, list[dict]] = {}
+    if all_shards:
+        # A reload replaces every shard's data, including shards with no rows in this file.
+        groups = {location_id: [] for location_id in shard_location_ids()}
+    for row in rows:
+        groups.setdefault(row_location_id(row), []).append(row)
     db = SessionLocal()
+    try:
+        for location_id in groups:
+            ensure_location(db, location_id)
+        db.commit()
+    finally:
+        db.close()
+    with ThreadPoolExecutor(max_workers=SHARD_WORKERS, thread_name_prefix="import") as pool:
+        futures = [
+            pool.submit(run_in_session, session_for_location(location_id), func, group_rows)
+            for location_id, group_rows in groups.items()
+        ]
+        return [future.result() for future in futures]
+
+
+def run_in_session(db, func, rows: list[dict]) -> tuple[int, ...]:
+    try:
+        return func(db, rows)
+    finally:
+        db.close()
+
+
+def reset_reviews(db) -> int:
+    db.query(models.EmployeeMention).delete()
+    db.query(models.AlertLog).delete()
+    db.query(models.ArchivedAlert).delete()
+    db.query(models.ReviewVersion).delete()
+    db.query(models.ReviewEvent).delete()
+    db.query(models.Review).delete()
+    db.commit()
+    return 0
+
+
+def import_review_rows(db, rows: list[dict]) -> tuple[int, int, int]:
     inserted = 0
+    updated = 0
     skipped = 0
-    try:
-        Base.metadata.create_all(bind=engine)
-        if reset:
-            db.query(models.EmployeeMention).delete()
-            db.query(models.AlertLog).delete()
-            db.query(models.ReviewVersion).delete()
-            db.query(models.Review).delete()
-            db.commit()
-
-        for row in rows:
-            existing = (
-                db.query(models.Review)
-                .filter(models.Review.google_review_id == row["google_review_id"])
-                .first()
-            )
-            if existing:
+    new_reviews: list[models.Review] = []
+    updated_ids: list[int] = []
+    for row in rows:
+        existing = (
+            db.query(models.Review)
+            .filter(models.Review.google_review_id == row["google_review_id"])
+            .first()
+        )
+        if existing:
+            rating = float(row["rating"])
+            if existing.review_text == row["review_text"] and existing.rating == rating:
                 skipped += 1
                 continue
-            location_id = int(row["location_id"])
-            ensure_location(db, location_id)
-            created_at = parse_dt(row["created_at"])
+            # max, not count: retention archives older versions, so the count can fall behind.
+            last_version = (
+                db.query(func.max(models.ReviewVersion.version_number))
+                .filter(models.ReviewVersion.review_id == existing.id)
+                .scalar()
+            )
             db.add(
-                models.Review(
-                    location_id=location_id,
-                    google_review_id=row["google_review_id"],
-                    reviewer_name=row["reviewer_name"],
-                    rating=float(row["rating"]),
-                    review_text=row["review_text"],
-                    review_date=created_at,
-                    created_at=created_at,
+                models.ReviewVersion(
+                    review_id=existing.id,
+                    version_number=(last_version or 0) + 1,
+                    review_text=existing.review_text,
+                    rating=existing.rating,
                 )
             )
-            inserted += 1
-        db.commit()
-        print(f"Imported reviews: inserted={inserted}, skipped={skipped}")
-    finally:
-        db.close()
+            existing.review_text = row["review_text"]
+            existing.rating = rating
+            updated_ids.append(existing.id)
+            updated += 1
+            continue
+        location_id = row_location_id(row)
+        ensure_location(db, location_id)
+        created_at = parse_dt(row["created_at"])
+        review = models.Review(
+            location_id=location_id,
+            google_review_id=row["google_review_id"],
+            reviewer_name=row["reviewer_name"],
+            rating=float(row["rating"]),
+            review_text=row["review_text"],
+            review_date=created_at,
+            created_at=created_at,
+        )
+        db.add(review)
+        new_reviews.append(review)
+        inserted += 1
+    db.flush()
+    emit_review_events(db, [review.id for review in new_reviews], EVENT_REVIEW_CREATED)
+    emit_review_events(db, updated_ids, EVENT_REVIEW_UPDATED)
+    db.commit()
+    return inserted, updated, skipped
+
+
+RELOAD_BATCH_SIZE = 10_000
+REVIEW_RELOAD_MODELS = [
+    models.Review,
+    models.ReviewVersion,
+    models.EmployeeMention,
+    models.AlertLog,
+    models.ArchivedAlert,
+    models.ReviewEvent,
+    models.PipelineCursor,
+]
+EMPLOYEE_RELOAD_MODELS = [models.Employee, models.EmployeeMention]
+
+
+def bulk_reload(db, reload_models: list, target, records: list[dict], location_ids: set[int]) -> None:
+    # Drop and recreate the tables, bulk insert with executemany, then build secondary indexes once.
+    for location_id in sorted(location_ids):
+        ensure_location(db, location_id)
+    db.commit()
+
+    tables = [model.__table__ for model in reload_models]
+    bind = db.get_bind()
+    # pysqlite only opens a transaction before INSERT/UPDATE/DELETE, so the DROP and CREATE statements
+    # would run outside it. In autocommit mode the BEGIN below is ours, and a failed load rolls back the
+    # drops too instead of leaving empty tables behind.
+    with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        synchronous = conn.execute(text("PRAGMA synchronous")).scalar()
+        # The tables are being rebuilt from scratch, so a crash mid-load just means reloading again.
+        conn.execute(text("PRAGMA synchronous = OFF"))
+        conn.commit()
+        try:
+            with conn.begin():
+                conn.exec_driver_sql("BEGIN")
+                rebuild_tables(conn, tables)
+                for start in range(0, len(records), RELOAD_BATCH_SIZE):
+                    conn.execute(insert(target.__table__), records[start : start + RELOAD_BATCH_SIZE])
+                create_deferred_indexes(conn, tables)
+                # Every review needs mention detection and alerting again.
+                conn.execute(
+                    text(
+                        "INSERT INTO review_events (review_id, event_type, created_at) "
+                        "SELECT id, :event_type, CURRENT_TIMESTAMP FROM reviews ORDER BY id"
+                    ),
+                    {"event_type": EVENT_REVIEW_CREATED},
+                )
+                bump_table_versions(conn, [table.name for table in tables])
+        finally:
+            conn.execute(text(f"PRAGMA synchronous = {int(synchronous)}"))
+            conn.commit()
+
+
+def review_reload_records(rows: list[dict]) -> tuple[list[dict], int]:
+    # Every row is converted and checked before any shard drops a table, so a bad file leaves the data as it was.
+    records = []
+    seen: set[str] = set()
+    skipped = 0
+    required = [column.key for column in models.Review.__table__.columns if not column.nullable]
+    for number, row in enumerate(rows, start=1):
+        try:
+            google_review_id = row["google_review_id"]
+            if google_review_id in seen:
+                skipped += 1
+                continue
+            created_at = parse_dt(row["created_at"])
+            record = {
+                "location_id": row_location_id(row),
+                "google_review_id": google_review_id,
+                "reviewer_name": row["reviewer_name"],
+                "rating": float(row["rating"]),
+                "review_text": row["review_text"],
+                "review_date": created_at,
+                "created_at": created_at,
+            }
+        except (KeyError, TypeError, ValueError) as exc:
+            raise ValueError(f"Review row {number} is invalid: {exc!r}") from exc
+        missing = [key for key in required if key in record and record[key] is None]
+        if missing:
+            raise ValueError(f"Review row {number} is missing {', '.join(missing)}")
+        seen.add(google_review_id)
+        records.append(record)
+    return records, skipped
+
+
+def reload_review_rows(db, records: list[dict]) -> tuple[int, int, int]:
+    location_ids = {record["location_id"] for record in records}
+    bulk_reload(db, REVIEW_RELOAD_MODELS, models.Review, records, location_ids)
+    return len(records), 0, 0
+
+
+def import_reviews(path: Path, reset: bool = False, reload: bool = False) -> None:
+    rows = json.loads(path.read_text(encoding="utf-8"))
+    init_db()
+    if reload:
+        records, skipped = review_reload_records(rows)
+        results = run_per_location(records, reload_review_rows, all_shards=True) + [(0, 0, skipped)]
+    else:
+        if reset:
+            run_per_shard(reset_reviews)
+        results = run_per_location(rows, import_review_rows)
+    inserted, updated, skipped = (sum(values) for values in zip(*results)) if results else (0, 0, 0)
+    print(f"Imported reviews: inserted={inserted}, updated={updated}, skipped={skipped}")
 
 
 def parse_active(value: str) -> bool:
     return value.strip().lower() in {"1", "true", "yes", "y"}
 
 
-def import_employees(path: Path, reset: bool = False) -> None:
-    db = SessionLocal()
+def reset_employees(db) -> int:
+    db.query(models.EmployeeMention).delete()
+    db.query(models.Employee).delete()
+    db.commit()
+    return 0
+
+
+def import_employee_rows(db, rows: list[dict]) -> tuple[int, int]:
     inserted = 0
     skipped = 0
+    for row in rows:
+        full_name = (row.get("full_name") or "").strip()
+        if not full_name:
+            continue
+        location_id = row_location_id(row)
+        ensure_location(db, location_id)
+        existing = (
+            db.query(models.Employee)
+            .filter(
+                models.Employee.full_name == full_name,
+                models.Employee.location_id == location_id,
+            )
+            .first()
+        )
+        if existing:
+            skipped += 1
+            continue
+        db.add(
+            models.Employee(
+                location_id=location_id,
+                full_name=full_name,
+                is_active=parse_active(row.get("active", "true")),
+            )
+        )
+        inserted += 1
+    db.commit()
+    return inserted, skipped
+
+
+def reload_employee_rows(db, rows: list[dict]) -> tuple[int, int]:
+    records = []
+    seen: set[tuple[str, int]] = set()
+    location_ids: set[int] = set()
+    skipped = 0
+    for row in rows:
+        full_name = (row.get("full_name") or "").strip()
+        if not full_name:
+            continue
+        location_id = row_location_id(row)
+        if (full_name, location_id) in seen:
+            skipped += 1
+            continue
+        seen.add((full_name, location_id))
+        location_ids.add(location_id)
+        records.append(
+            {
+                "location_id": location_id,
+                "full_name": full_name,
+                "is_active": parse_active(row.get("active", "true")),
+                "created_at": datetime.utcnow(),
+            }
+        )
+    bulk_reload(db, EMPLOYEE_RELOAD_MODELS, models.Employee, records, location_ids)
+    return len(records), skipped
+
+
+def import_employees(path: Path, reset: bool = False, reload: bool = False) -> None:
+    init_db()
+    db = SessionLocal()
     try:
-        Base.metadata.create_all(bind=engine)
         ensure_location(db, 1)
-        if reset:
-            db.query(models.EmployeeMention).delete()
-            db.query(models.Employee).delete()
-            db.commit()
-
-        with path.open("r", encoding="utf-8-sig", newline="") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                full_name = (row.get("full_name") or "").strip()
-                if not full_name:
-                    continue
-                existing = (
-                    db.query(models.Employee)
-                    .filter(
-                        models.Employee.full_name == full_name,
-                        models.Employee.location_id == 1,
-                    )
-                    .first()
-                )
-                if existing:
-                    skipped += 1
-                    continue
-                db.add(
-                    models.Employee(
-                        location_id=1,
-                        full_name=full_name,
-                        is_active=parse_active(row.get("active", "true")),
-                    )
-                )
-                inserted += 1
         db.commit()
-        print(f"Imported employees: inserted={inserted}, skipped={skipped}")
     finally:
         db.close()
 
+    with path.open("r", encoding="utf-8-sig", newline="") as f:
+        rows = list(csv.DictReader(f))
+    if reload:
+        results = run_per_location(rows, reload_employee_rows, all_shards=True)
+    else:
+        if reset:
+            run_per_shard(reset_employees)
+        results = run_per_location(rows, import_employee_rows)
+    inserted, skipped = (sum(values) for values in zip(*results)) if results else (0, 0)
+    print(f"Imported employees: inserted={inserted}, skipped={skipped}")
+
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Import seed data into SQLite DB.")
@@ -131,16 +353,29 @@ def main() -> None:
     reviews_parser = subparsers.add_parser("reviews", help="Import reviews JSON.")
     reviews_parser.add_argument("--file", default="sample_reviews.json")
     reviews_parser.add_argument("--reset", action="store_true")
+    reviews_parser.add_argument(
+        "--reload",
+        action="store_true",
+        help="Replace all reviews: drop and rebuild the review tables, creating indexes after the load.",
+    )
 
     employees_parser = subparsers.add_parser("employees", help="Import employees CSV.")
     employees_parser.add_argument("--file", default="employees.csv")
     employees_parser.add_argument("--reset", action="store_true")
+    employees_parser.add_argument(
+        "--reload",
+        action="store_true",
+        help="Replace all employees: drop and rebuild the employee tables, creating indexes after the load.",
+    )
 
     args = parser.parse_args()
     if args.command == "reviews":
-        import_reviews(Path(args.file), reset=args.reset)
+        try:
+            import_reviews(Path(args.file), reset=args.reset, reload=args.reload)
+        except ValueError as exc:
+            parser.error(str(exc))
     elif args.command == "employees":
-        import_employees(Path(args.file), reset=args.reset)
+        import_employees(Path(args.file), reset=args.reset, reload=args.reload)
 
 
 if __name__ == "__main__":
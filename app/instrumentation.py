@@ -0,0 +1,174 @@
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+SAMPLE_WINDOW = 1024
+QUANTILES = (0.5, 0.95)
+
+
+def metrics_enabled() -> bool:
+    return os.getenv("QUERY_METRICS_ENABLED", "").strip().lower() in {"1", "true", "yes"}
+
+
+def slow_query_ms() -> float:
+    try:
+        return float(os.getenv("SLOW_QUERY_MS", "100"))
+    except ValueError:
+        return 100.0
+
+
+# Mutable per-request counters; sync handlers run in a threadpool that copies this context.
+_request_stats: ContextVar[Optional[dict[str, float]]] = ContextVar("request_stats", default=None)
+
+
+class RouteStats:
+    def __init__(self) -> None:
+        self.count = 0
+        self.latency_sum = 0.0
+        self.query_sum = 0
+        self.latencies: deque[float] = deque(maxlen=SAMPLE_WINDOW)
+        self.queries: deque[int] = deque(maxlen=SAMPLE_WINDOW)
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.routes: dict[tuple[str, str], RouteStats] = {}
+        self.queries_total = 0
+        self.query_seconds_total = 0.0
+        self.slow_queries_total = 0
+
+    def record_query(self, seconds: float, slow: bool) -> None:
+        with self._lock:
+            self.queries_total += 1
+            self.query_seconds_total += seconds
+            if slow:
+                self.slow_queries_total += 1
+
+    def record_request(self, method: str, route: str, seconds: float, queries: int) -> None:
+        with self._lock:
+            stats = self.routes.setdefault((method, route), RouteStats())
+            stats.count += 1
+            stats.latency_sum += seconds
+            stats.query_sum += queries
+            stats.latencies.append(seconds)
+            stats.queries.append(queries)
+
+    def render(self) -> str:
+        with self._lock:
+            routes = sorted(self.routes.items())
+            lines = [
+                "# HELP http_request_duration_seconds Request latency by route.",
+                "# TYPE http_request_duration_seconds summary",
+            ]
+            for (method, route), stats in routes:
+                labels = f'method="{method}",route="{escape_label(route)}"'
+                for quantile in QUANTILES:
+                    value = percentile(list(stats.latencies), quantile)
+                    lines.append(f'http_request_duration_seconds{{{labels},quantile="{quantile}"}} {value:.6f}')
+                lines.append(f"http_request_duration_seconds_sum{{{labels}}} {stats.latency_sum:.6f}")
+                lines.append(f"http_request_duration_seconds_count{{{labels}}} {stats.count}")
+
+            lines += [
+                "# HELP http_request_db_queries Database queries issued per request.",
+                "# TYPE http_request_db_queries summary",
+            ]
+            for (method, route), stats in routes:
+                labels = f'method="{method}",route="{escape_label(route)}"'
+                for quantile in QUANTILES:
+                    value = percentile(list(stats.queries), quantile)
+                    lines.append(f'http_request_db_queries{{{labels},quantile="{quantile}"}} {value:g}')
+                lines.append(f"http_request_db_queries_sum{{{labels}}} {stats.query_sum}")
+                lines.append(f"http_request_db_queries_count{{{labels}}} {stats.count}")
+
+            lines += [
+                "# HELP db_queries_total Database queries executed, including background jobs.",
+                "# TYPE db_queries_total counter",
+                f"db_queries_total {self.queries_total}",
+                "# HELP db_query_seconds_total Time spent executing database queries.",
+                "# TYPE db_query_seconds_total counter",
+                f"db_query_seconds_total {self.query_seconds_total:.6f}",
+                "# HELP db_slow_queries_total Queries slower than SLOW_QUERY_MS.",
+                "# TYPE db_slow_queries_total counter",
+                f"db_slow_queries_total {self.slow_queries_total}",
+            ]
+        return "\n".join(lines) + "\n"
+
+
+def percentile(samples: list[float], quantile: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, math.ceil(quantile * len(ordered)) - 1))
+    return ordered[index]
+
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = MetricsRegistry()
+
+
+def explain_query_plan(cursor, statement: str, parameters) -> list[str]:
+    if not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+        return []
+    try:
+        rows = cursor.connection.execute("EXPLAIN QUERY PLAN " + statement, parameters or ()).fetchall()
+    except Exception as exc:
+        return [f"(plan unavailable: {exc})"]
+    return [str(row[-1]) for row in rows]
+
+
+def instrument_engine(engine: Engine) -> None:
+    threshold_ms = slow_query_ms()
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+        slow = elapsed * 1000 >= threshold_ms
+        registry.record_query(elapsed, slow)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats["queries"] += 1
+            stats["query_seconds"] += elapsed
+        if slow:
+            print(f"SLOW QUERY ({elapsed * 1000:.1f} ms): {' '.join(statement.split())}")
+            if not executemany:
+                for line in explain_query_plan(cursor, statement, parameters):
+                    print(f"  PLAN: {line}")
+
+
+def install_instrumentation(app: FastAPI, engine: Engine) -> None:
+    instrument_engine(engine)
+
+    @app.middleware("http")
+    async def track_request(request: Request, call_next):
+        stats = {"queries": 0, "query_seconds": 0.0}
+        token = _request_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await call_next(request)
+        finally:
+            _request_stats.reset(token)
+        route = request.scope.get("route")
+        route_path = getattr(route, "path", None) or "unmatched"
+        registry.record_request(request.method, route_path, time.perf_counter() - started, int(stats["queries"]))
+        return response
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics() -> PlainTextResponse:
+        return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -1,29 +1,101 @@
+import asyncio
 from datetime import date, datetime, time, timedelta
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional, TypeVar
+from urllib.parse import urlencode
 
-from fastapi import FastAPI, Form, Request
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi import FastAPI, Form, HTTPException, Request
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
-from sqlalchemy import func, text
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import func, text, tuple_
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
-from app.alerts import run_negative_review_scan
-from app.db import Base, SessionLocal, engine, ensure_employee_mentions_schema
-from app.mentions import run_employee_mention_detection
+from app.db import (
+    SHARDING_ENABLED,
+    SessionLocal,
+    engine,
+    init_db,
+    map_per_shard,
+    session_for_location,
+    shard_location_ids,
+)
+from app.events import hub
+from app.exports import EXPORT_FORMATS, parse_date_param, stream_review_export
+from app.http_cache import is_not_modified, not_modified_response, page_version
+from app.instrumentation import install_instrumentation, metrics_enabled
+from app.mentions import RosterIndex, apply_mention_assignments, name_tokens
+from app.scheduler import JOB_ALERTS, JOB_MENTIONS, enqueue, scheduler_status, start_scheduler, stop_scheduler
+from app.stats import merge_review_summaries, review_summary
+from app.templating import build_templates
 from app import models  # noqa: F401
 
 app = FastAPI(title="Google Review Portal MVP")
-templates = Jinja2Templates(directory="app/templates")
+templates = build_templates()
 app.mount("/static", StaticFiles(directory=Path(__file__).parent / "static"), name="static")
+if metrics_enabled():
+    install_instrumentation(app, engine)
+
+T = TypeVar("T")
+ALERTS_PAGE_SIZE = 50
+TRIAGE_PAGE_SIZE = 50
+SSE_HEARTBEAT_SECONDS = 15
+ALERT_STATUSES = ["sent", "logged", "triggered"]
+
+# Tables each cached page reads; any write to one of them changes the page's ETag.
+REVIEWS_PAGE_TABLES = ["reviews"]
+ALERTS_PAGE_TABLES = ["alert_log", "alert_rules", "locations", "reviews"]
+DASHBOARD_PAGE_TABLES = ["locations", "reviews"]
+EMPLOYEES_PAGE_TABLES = ["employee_mentions", "employees", "reviews"]
+TRIAGE_PAGE_TABLES = ["employee_mentions", "employees", "locations", "reviews"]
+
+
+class MentionAssignment(BaseModel):
+    review_id: int
+    employee_id: int
+    # Required with SHARD_BY_LOCATION=1, where review and employee IDs are per shard.
+    location_id: Optional[int] = None
+
+
+def location_session(location_id: Optional[int]) -> Optional[Session]:
+    # With sharding on, a review or employee ID only identifies a row together with its location.
+    if not SHARDING_ENABLED:
+        return SessionLocal()
+    if location_id is None or location_id not in shard_location_ids():
+        return None
+    return session_for_location(location_id)
+
+
+def map_for_location(location_id: Optional[int], func: Callable[[Session], T]) -> list[T]:
+    # Just that location's shard when sharding is on and a location is given; otherwise every shard.
+    if location_id is None or not SHARDING_ENABLED:
+        return map_per_shard(func)
+    db = location_session(location_id)
+    if db is None:
+        return []
+    try:
+        return [func(db)]
+    finally:
+        db.close()
+
+
+def review_url(review_id: int, location_id: Optional[int]) -> str:
+    if location_id is None:
+        return f"/reviews/{review_id}"
+    return f"/reviews/{review_id}?" + urlencode({"location_id": location_id})
 
 
 @app.on_event("startup")
 def on_startup() -> None:
-    Base.metadata.create_all(bind=engine)
-    ensure_employee_mentions_schema()
+    init_db()
+    start_scheduler()
+
+
+@app.on_event("shutdown")
+def on_shutdown() -> None:
+    stop_scheduler()
 
 
 @app.get("/", response_class=HTMLResponse)
@@ -51,19 +123,35 @@ def health() -> dict[str, str]:
 def reviews_page(request: Request) -> HTMLResponse:
     db: Session = SessionLocal()
     try:
-        reviews = db.query(models.Review).order_by(models.Review.created_at.desc()).all()
+        version = page_version(db, request, REVIEWS_PAGE_TABLES)
+        if is_not_modified(request, version):
+            return not_modified_response(version)
+        reviews = sorted(
+            (
+                review
+                for shard_reviews in map_per_shard(
+                    lambda shard_db: shard_db.query(models.Review).order_by(models.Review.created_at.desc()).all()
+                )
+                for review in shard_reviews
+            ),
+            key=lambda review: review.created_at,
+            reverse=True,
+        )
         return templates.TemplateResponse(
             request=request,
             name="reviews.html",
             context={"reviews": reviews, "title": "Reviews"},
+            headers=version.headers(),
         )
     finally:
         db.close()
 
 
 @app.get("/reviews/{review_id}", response_class=HTMLResponse)
-def review_detail_page(request: Request, review_id: int) -> HTMLResponse:
-    db: Session = SessionLocal()
+def review_detail_page(request: Request, review_id: int, location_id: Optional[int] = None) -> HTMLResponse:
+    db = location_session(location_id)
+    if db is None:
+        return HTMLResponse(status_code=404, content="Review not found")
     try:
         row = (
             db.query(models.Review, models.Location)
@@ -127,61 +215,28 @@ def review_detail_page(request: Request, review_id: int) -> HTMLResponse:
 
 
 @app.post("/reviews/{review_id}/mentions")
-def attach_employee_mention(review_id: int, employee_id: int = Form(...)) -> RedirectResponse:
-    db: Session = SessionLocal()
+def attach_employee_mention(
+    review_id: int, employee_id: int = Form(...), location_id: Optional[int] = None
+) -> RedirectResponse:
+    db = location_session(location_id)
+    if db is None:
+        return RedirectResponse(url="/reviews", status_code=303)
     try:
         review = db.query(models.Review).filter(models.Review.id == review_id).first()
         if review is None:
             return RedirectResponse(url="/reviews", status_code=303)
 
-        employee = db.query(models.Employee).filter(models.Employee.id == employee_id).first()
-        if employee is None:
-            return RedirectResponse(url=f"/reviews/{review_id}", status_code=303)
-
-        # Manual override takes precedence: remove auto mentions for this review.
-        db.query(models.EmployeeMention).filter(
-            models.EmployeeMention.review_id == review_id,
-            models.EmployeeMention.detection_method == "auto",
-        ).delete()
-
-        existing = (
-            db.query(models.EmployeeMention)
-            .filter(models.EmployeeMention.review_id == review_id)
-            .filter(models.EmployeeMention.employee_id == employee_id)
-            .filter(models.EmployeeMention.detection_method == "manual")
-            .first()
-        )
-        if existing is None:
-            upsert_target = (
-                db.query(models.EmployeeMention)
-                .filter(models.EmployeeMention.review_id == review_id)
-                .filter(models.EmployeeMention.employee_id == employee_id)
-                .first()
-            )
-            if upsert_target is None:
-                db.add(
-                    models.EmployeeMention(
-                        review_id=review_id,
-                        employee_id=employee_id,
-                        detection_method="manual",
-                        ambiguity_flag=False,
-                        confidence_score=None,
-                    )
-                )
-            else:
-                upsert_target.detection_method = "manual"
-                upsert_target.ambiguity_flag = False
-                upsert_target.confidence_score = None
-
-        db.commit()
-        return RedirectResponse(url=f"/reviews/{review_id}", status_code=303)
+        apply_mention_assignments(db, [(review_id, employee_id)])
+        return RedirectResponse(url=review_url(review_id, location_id), status_code=303)
     finally:
         db.close()
 
 
 @app.post("/reviews/{review_id}/mentions/{mention_id}/remove")
-def remove_mention(review_id: int, mention_id: int) -> RedirectResponse:
-    db: Session = SessionLocal()
+def remove_mention(review_id: int, mention_id: int, location_id: Optional[int] = None) -> RedirectResponse:
+    db = location_session(location_id)
+    if db is None:
+        return RedirectResponse(url="/reviews", status_code=303)
     try:
         mention = (
             db.query(models.EmployeeMention)
@@ -192,64 +247,363 @@ def remove_mention(review_id: int, mention_id: int) -> RedirectResponse:
         if mention is not None:
             db.delete(mention)
             db.commit()
-        return RedirectResponse(url=f"/reviews/{review_id}", status_code=303)
+        return RedirectResponse(url=review_url(review_id, location_id), status_code=303)
     finally:
         db.close()
 
 
+def parse_alert_cursor(value: Optional[str]) -> Optional[tuple[datetime, int]]:
+    triggered_at, _, alert_id = (value or "").partition("|")
+    try:
+        return datetime.fromisoformat(triggered_at), int(alert_id)
+    except ValueError:
+        return None
+
+
+def alert_page_rows(
+    db: Session,
+    status: Optional[str],
+    rule: Optional[str],
+    location_id: Optional[int],
+    cursor: Optional[tuple[datetime, int]],
+) -> list:
+    query = (
+        db.query(
+            models.AlertLog.id,
+            models.AlertLog.triggered_at,
+            models.AlertLog.status,
+            models.Review.id.label("review_id"),
+            models.Review.location_id,
+            models.Review.reviewer_name,
+            models.Review.rating,
+            models.Location.name.label("location"),
+            models.AlertLog.alert_type,
+        )
+        .join(models.Review, models.AlertLog.review_id == models.Review.id)
+        .join(models.Location, models.Review.location_id == models.Location.id)
+    )
+    if status:
+        query = query.filter(models.AlertLog.status == status)
+    if rule:
+        # Filter on alert_log's own column so the (alert_type, triggered_at, id) index applies.
+        query = query.filter(models.AlertLog.alert_type == rule)
+    if location_id is not None:
+        query = query.filter(models.AlertLog.location_id == location_id)
+    if cursor is not None:
+        query = query.filter(tuple_(models.AlertLog.triggered_at, models.AlertLog.id) < tuple_(*cursor))
+    return (
+        query.order_by(models.AlertLog.triggered_at.desc(), models.AlertLog.id.desc())
+        .limit(ALERTS_PAGE_SIZE + 1)
+        .all()
+    )
+
+
 @app.get("/alerts", response_class=HTMLResponse)
-def alerts_page(request: Request) -> HTMLResponse:
+def alerts_page(
+    request: Request,
+    status: Optional[str] = None,
+    rule: Optional[str] = None,
+    location_id: Optional[str] = None,
+    before: Optional[str] = None,
+) -> HTMLResponse:
     db: Session = SessionLocal()
     try:
-        rows = (
-            db.query(models.AlertLog, models.Review, models.Location, models.AlertRule)
-            .join(models.Review, models.AlertLog.review_id == models.Review.id)
-            .join(models.Location, models.Review.location_id == models.Location.id)
-            .join(models.AlertRule, models.AlertLog.alert_rule_id == models.AlertRule.id)
-            .order_by(models.AlertLog.triggered_at.desc())
-            .all()
+        version = page_version(db, request, ALERTS_PAGE_TABLES)
+        if is_not_modified(request, version):
+            return not_modified_response(version)
+        filters = {}
+        if status:
+            filters["status"] = status
+        if rule:
+            filters["rule"] = rule
+        location_id_int: Optional[int] = None
+        if location_id not in (None, "", "all"):
+            try:
+                location_id_int = int(location_id)
+                filters["location_id"] = location_id
+            except ValueError:
+                pass
+        cursor = parse_alert_cursor(before)
+
+        def shard_rows(shard_db: Session) -> list:
+            return alert_page_rows(shard_db, status, rule, location_id_int, cursor)
+
+        shard_results = map_for_location(location_id_int, shard_rows)
+        # Each shard returns its own newest page; the merged page is the newest of those.
+        rows = sorted(
+            (row for shard_result in shard_results for row in shard_result),
+            key=lambda row: (row.triggered_at, row.id),
+            reverse=True,
+        )[: ALERTS_PAGE_SIZE + 1]
+        next_url = None
+        if len(rows) > ALERTS_PAGE_SIZE:
+            rows = rows[:ALERTS_PAGE_SIZE]
+            last = rows[-1]
+            next_url = "/alerts?" + urlencode({**filters, "before": f"{last.triggered_at.isoformat()}|{last.id}"})
+
+        alerts = [
+            {
+                "id": row.id,
+                "sent_at": row.triggered_at,
+                "review_id": row.review_id,
+                "location_id": row.location_id,
+                "reviewer_name": row.reviewer_name,
+                "location": row.location,
+                "rating": row.rating,
+                "alert_type": row.alert_type,
+                "status": row.status,
+            }
+            for row in rows
+        ]
+        rule_names = sorted(
+            {
+                name
+                for shard_names in map_per_shard(
+                    lambda shard_db: [row.name for row in shard_db.query(models.AlertRule.name).distinct()]
+                )
+                for name in shard_names
+            }
         )
-        alerts = []
-        for alert_log, review, location, alert_rule in rows:
-            alerts.append(
-                {
-                    "sent_at": alert_log.triggered_at,
-                    "reviewer_name": review.reviewer_name,
-                    "location": location.name,
-                    "rating": review.rating,
-                    "alert_type": alert_rule.name,
-                    "status": alert_log.status,
-                }
-            )
+        locations = db.query(models.Location).order_by(models.Location.name.asc()).all()
         return templates.TemplateResponse(
             request=request,
             name="alerts.html",
-            context={"alerts": alerts, "title": "Alerts"},
+            context={
+                "alerts": alerts,
+                "title": "Alerts",
+                "statuses": ALERT_STATUSES,
+                "rule_names": rule_names,
+                "locations": locations,
+                "selected_status": status or "",
+                "selected_rule": rule or "",
+                "selected_location_id": filters.get("location_id", "all"),
+                "is_first_page": cursor is None,
+                "first_url": "/alerts?" + urlencode(filters) if filters else "/alerts",
+                "next_url": next_url,
+            },
+            headers=version.headers(),
         )
     finally:
         db.close()
 
 
-@app.post("/alerts/run")
-def run_alerts_once() -> dict[str, int | str]:
-    db: Session = SessionLocal()
+@app.post("/alerts/run", status_code=202)
+def run_alerts_once() -> dict[str, object]:
+    return {"status": "queued", "job": enqueue(JOB_ALERTS)}
+
+
+@app.post("/mentions/run", status_code=202)
+def run_mentions_once() -> dict[str, object]:
+    return {"status": "queued", "job": enqueue(JOB_MENTIONS)}
+
+
+def assign_mentions(assignments: list[tuple[Optional[int], int, int]]) -> tuple[int, int]:
+    # (location_id, review_id, employee_id); with sharding on, each location's batch goes to its shard.
+    by_location: dict[Optional[int], list[tuple[int, int]]] = {}
+    for location_id, review_id, employee_id in assignments:
+        by_location.setdefault(location_id if SHARDING_ENABLED else None, []).append((review_id, employee_id))
+    applied = 0
+    skipped = 0
+    for location_id, pairs in by_location.items():
+        db = location_session(location_id)
+        if db is None:
+            skipped += len(pairs)
+            continue
+        try:
+            location_applied, location_skipped = apply_mention_assignments(db, pairs)
+        finally:
+            db.close()
+        applied += location_applied
+        skipped += location_skipped
+    return applied, skipped
+
+
+def parse_triage_cursor(value: Optional[str]) -> Optional[tuple[int, int]]:
+    location_id, _, review_id = (value or "").partition("|")
     try:
-        created = run_negative_review_scan(db)
-        return {"status": "ok", "created_alerts": created}
-    finally:
-        db.close()
+        return int(location_id), int(review_id)
+    except ValueError:
+        return None
+
+
+def triage_items(db: Session, cursor: Optional[tuple[int, int]]) -> list[dict[str, object]]:
+    # Reviews whose only mention is an unresolved ambiguous one, ordered by (location, review id).
+    query = (
+        db.query(
+            models.Review.id,
+            models.Review.reviewer_name,
+            models.Review.rating,
+            models.Review.review_text,
+            models.Review.location_id,
+            models.Location.name.label("location"),
+            models.EmployeeMention.mention_text,
+        )
+        .join(models.EmployeeMention, models.EmployeeMention.review_id == models.Review.id)
+        .join(models.Location, models.Review.location_id == models.Location.id)
+        .filter(
+            models.EmployeeMention.ambiguity_flag.is_(True),
+            models.EmployeeMention.employee_id.is_(None),
+            models.EmployeeMention.detection_method == "auto",
+        )
+    )
+    if cursor is not None:
+        query = query.filter(tuple_(models.Review.location_id, models.Review.id) > tuple_(*cursor))
+    rows = query.order_by(models.Review.location_id.asc(), models.Review.id.asc()).limit(TRIAGE_PAGE_SIZE + 1).all()
+
+    location_ids = sorted({row.location_id for row in rows})
+    employees_by_location: dict[int, list[models.Employee]] = {}
+    if location_ids:
+        for employee in (
+            db.query(models.Employee)
+            .filter(models.Employee.location_id.in_(location_ids))
+            .order_by(models.Employee.full_name.asc())
+        ):
+            employees_by_location.setdefault(employee.location_id, []).append(employee)
+    rosters = {location_id: RosterIndex(employees) for location_id, employees in employees_by_location.items()}
+
+    items = []
+    for row in rows:
+        employees = employees_by_location.get(row.location_id, [])
+        # The names the detector hesitated between are offered first.
+        candidates: list[models.Employee] = []
+        if row.mention_text and row.location_id in rosters:
+            roster = rosters[row.location_id]
+            for match in roster.first_name_matches(row.mention_text, name_tokens(row.mention_text)):
+                candidates.extend(employee for employee in match.employees if employee not in candidates)
+        items.append(
+            {
+                "review_id": row.id,
+                "location_id": row.location_id,
+                "reviewer_name": row.reviewer_name,
+                "rating": row.rating,
+                "review_text": row.review_text,
+                "location": row.location,
+                "mention_text": row.mention_text,
+                "candidates": candidates,
+                "others": [employee for employee in employees if employee not in candidates],
+            }
+        )
+    return items
 
 
-@app.post("/mentions/run")
-def run_mentions_once() -> dict[str, int | str]:
+@app.get("/mentions/triage", response_class=HTMLResponse)
+def mention_triage_page(request: Request, after: Optional[str] = None) -> HTMLResponse:
     db: Session = SessionLocal()
     try:
-        created = run_employee_mention_detection(db)
-        return {"status": "ok", "created_mentions": created}
+        version = page_version(db, request, TRIAGE_PAGE_TABLES)
+        if is_not_modified(request, version):
+            return not_modified_response(version)
+        cursor = parse_triage_cursor(after)
+        shard_items = map_per_shard(lambda shard_db: triage_items(shard_db, cursor))
+        items = sorted(
+            (item for items_in_shard in shard_items for item in items_in_shard),
+            key=lambda item: (item["location_id"], item["review_id"]),
+        )
+        next_url = None
+        if len(items) > TRIAGE_PAGE_SIZE:
+            items = items[:TRIAGE_PAGE_SIZE]
+            last = items[-1]
+            next_url = "/mentions/triage?" + urlencode({"after": f"{last['location_id']}|{last['review_id']}"})
+
+        return templates.TemplateResponse(
+            request=request,
+            name="mention_triage.html",
+            context={
+                "title": "Mention Triage",
+                "items": items,
+                "after": after if cursor is not None else None,
+                "is_first_page": cursor is None,
+                "next_url": next_url,
+            },
+            headers=version.headers(),
+        )
     finally:
         db.close()
 
 
+@app.post("/mentions/triage")
+def triage_mentions(assignments: list[MentionAssignment]) -> dict[str, int]:
+    applied, skipped = assign_mentions(
+        [(item.location_id, item.review_id, item.employee_id) for item in assignments]
+    )
+    return {"applied": applied, "skipped": skipped}
+
+
+@app.post("/mentions/triage/form")
+async def triage_mentions_form(request: Request) -> RedirectResponse:
+    # One select per queued review, named review_<location_id>_<review_id>; blank means "decide later".
+    form = await request.form()
+    assignments = []
+    for key, value in form.items():
+        parts = key.split("_")
+        if len(parts) == 3 and parts[0] == "review" and parts[1].isdigit() and parts[2].isdigit():
+            if str(value).isdigit():
+                assignments.append((int(parts[1]), int(parts[2]), int(value)))
+    await run_in_threadpool(assign_mentions, assignments)
+    after = str(form.get("after") or "")
+    url = "/mentions/triage?" + urlencode({"after": after}) if parse_triage_cursor(after) else "/mentions/triage"
+    return RedirectResponse(url=url, status_code=303)
+
+
+@app.get("/jobs")
+def jobs_status() -> dict[str, object]:
+    return {"jobs": scheduler_status()}
+
+
+@app.get("/events")
+async def event_stream(request: Request) -> StreamingResponse:
+    queue = hub.subscribe()
+
+    async def stream():
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+                yield message
+        finally:
+            hub.unsubscribe(queue)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/exports/reviews")
+def export_reviews(
+    format: str = "csv",
+    location_id: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+):
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=422, detail=f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    export_format = format
+    try:
+        parsed_start_date = parse_date_param(start_date)
+        parsed_end_date = parse_date_param(end_date)
+    except ValueError:
+        raise HTTPException(status_code=422, detail="start_date and end_date must be YYYY-MM-DD dates")
+    chunks = stream_review_export(
+        export_format,
+        location_id=location_id,
+        start_date=parsed_start_date,
+        end_date=parsed_end_date,
+    )
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_FORMATS[export_format],
+        headers={"Content-Disposition": f'attachment; filename="reviews.{export_format}"'},
+    )
+
+
 @app.get("/dashboard", response_class=HTMLResponse)
 def dashboard_page(
     request: Request,
@@ -259,6 +613,9 @@ def dashboard_page(
 ) -> HTMLResponse:
     db: Session = SessionLocal()
     try:
+        version = page_version(db, request, DASHBOARD_PAGE_TABLES)
+        if is_not_modified(request, version):
+            return not_modified_response(version)
         parsed_start_date: Optional[date] = None
         parsed_end_date: Optional[date] = None
         normalized_start_date = (start_date or "").strip()
@@ -276,6 +633,7 @@ def dashboard_page(
 
         review_filters = []
         selected_location_id = location_id or "all"
+        location_id_int: Optional[int] = None
         if location_id not in (None, "all"):
             try:
                 location_id_int = int(location_id)
@@ -288,34 +646,9 @@ def dashboard_page(
             end_next_day = parsed_end_date + timedelta(days=1)
             review_filters.append(models.Review.created_at < datetime.combine(end_next_day, time.min))
 
-        total_reviews = db.query(func.count(models.Review.id)).filter(*review_filters).scalar() or 0
-        avg_rating = db.query(func.avg(models.Review.rating)).filter(*review_filters).scalar()
-        negative_reviews = (
-            db.query(func.count(models.Review.id))
-            .filter(*review_filters)
-            .filter(models.Review.rating <= 2)
-            .scalar()
-            or 0
-        )
-        positive_reviews = (
-            db.query(func.count(models.Review.id))
-            .filter(*review_filters)
-            .filter(models.Review.rating >= 3)
-            .scalar()
-            or 0
-        )
-
-        reviews_by_day_raw = (
-            db.query(
-                func.date(models.Review.created_at).label("day"),
-                func.count(models.Review.id).label("count"),
-            )
-            .filter(*review_filters)
-            .group_by(func.date(models.Review.created_at))
-            .order_by(func.date(models.Review.created_at).desc())
-            .all()
-        )
-        reviews_by_day = [{"day": row.day, "count": row.count} for row in reviews_by_day_raw]
+        # An unknown location_id reads nothing; it must not open (and create) a shard file.
+        summaries = map_for_location(location_id_int, lambda shard_db: review_summary(shard_db, review_filters))
+        summary = merge_review_summaries(summaries)
         locations = db.query(models.Location).order_by(models.Location.name.asc()).all()
 
         return templates.TemplateResponse(
@@ -323,54 +656,67 @@ def dashboard_page(
             name="dashboard.html",
             context={
                 "title": "Dashboard",
-                "total_reviews": total_reviews,
-                "average_rating": round(float(avg_rating), 2) if avg_rating is not None else 0,
-                "negative_reviews": negative_reviews,
-                "positive_reviews": positive_reviews,
-                "reviews_by_day": reviews_by_day,
+                **summary,
                 "locations": locations,
                 "selected_location_id": selected_location_id,
                 "selected_start_date": normalized_start_date,
                 "selected_end_date": normalized_end_date,
             },
+            headers=version.headers(),
         )
     finally:
         db.close()
 
 
+def employee_rows(db: Session, active_only: bool) -> list[dict[str, object]]:
+    employees_query = db.query(models.Employee).order_by(models.Employee.full_name.asc())
+    if active_only:
+        employees_query = employees_query.filter(models.Employee.is_active.is_(True))
+    employees = employees_query.all()
+
+    rows = []
+    for employee in employees:
+        base_query = (
+            db.query(models.Review)
+            .join(models.EmployeeMention, models.EmployeeMention.review_id == models.Review.id)
+            .filter(models.EmployeeMention.employee_id == employee.id)
+            .filter(models.EmployeeMention.ambiguity_flag.is_(False))
+        )
+        mentions_count = base_query.count()
+        avg_rating = base_query.with_entities(func.avg(models.Review.rating)).scalar()
+        low_count = base_query.filter(models.Review.rating <= 2).count()
+        high_count = base_query.filter(models.Review.rating >= 3).count()
+        rows.append(
+            {
+                "id": employee.id,
+                "location_id": employee.location_id,
+                "full_name": employee.full_name,
+                "mentions": mentions_count,
+                "avg_rating": round(float(avg_rating), 2) if avg_rating is not None else 0,
+                "low_count": low_count,
+                "high_count": high_count,
+                "is_active": employee.is_active,
+            }
+        )
+    return rows
+
+
 @app.get("/employees", response_class=HTMLResponse)
 def employees_page(request: Request, active_only: Optional[str] = "1") -> HTMLResponse:
     db: Session = SessionLocal()
     try:
+        version = page_version(db, request, EMPLOYEES_PAGE_TABLES)
+        if is_not_modified(request, version):
+            return not_modified_response(version)
         active_only_flag = active_only != "0"
-        employees_query = db.query(models.Employee).order_by(models.Employee.full_name.asc())
-        if active_only_flag:
-            employees_query = employees_query.filter(models.Employee.is_active.is_(True))
-        employees = employees_query.all()
-
-        rows = []
-        for employee in employees:
-            base_query = (
-                db.query(models.Review)
-                .join(models.EmployeeMention, models.EmployeeMention.review_id == models.Review.id)
-                .filter(models.EmployeeMention.employee_id == employee.id)
-                .filter(models.EmployeeMention.ambiguity_flag.is_(False))
-            )
-            mentions_count = base_query.count()
-            avg_rating = base_query.with_entities(func.avg(models.Review.rating)).scalar()
-            low_count = base_query.filter(models.Review.rating <= 2).count()
-            high_count = base_query.filter(models.Review.rating >= 3).count()
-            rows.append(
-                {
-                    "id": employee.id,
-                    "full_name": employee.full_name,
-                    "mentions": mentions_count,
-                    "avg_rating": round(float(avg_rating), 2) if avg_rating is not None else 0,
-                    "low_count": low_count,
-                    "high_count": high_count,
-                    "is_active": employee.is_active,
-                }
-            )
+        rows = sorted(
+            (
+                row
+                for shard_rows in map_per_shard(lambda shard_db: employee_rows(shard_db, active_only_flag))
+                for row in shard_rows
+            ),
+            key=lambda row: row["full_name"],
+        )
 
         return templates.TemplateResponse(
             request=request,
@@ -380,14 +726,25 @@ def employees_page(request: Request, active_only: Optional[str] = "1") -> HTMLRe
                 "rows": rows,
                 "active_only": "1" if active_only_flag else "0",
             },
+            headers=version.headers(),
         )
     finally:
         db.close()
 
 
 @app.get("/employees/{employee_id}", response_class=HTMLResponse)
-def employee_detail_page(request: Request, employee_id: int) -> HTMLResponse:
-    db: Session = SessionLocal()
+def employee_detail_page(request: Request, employee_id: int, location_id: Optional[int] = None) -> HTMLResponse:
+    # The change counters live in the primary database, the employee in its location's shard.
+    primary_db: Session = SessionLocal()
+    try:
+        version = page_version(primary_db, request, EMPLOYEES_PAGE_TABLES)
+    finally:
+        primary_db.close()
+    if is_not_modified(request, version):
+        return not_modified_response(version)
+    db = location_session(location_id)
+    if db is None:
+        return HTMLResponse(status_code=404, content="Employee not found")
     try:
         employee = db.query(models.Employee).filter(models.Employee.id == employee_id).first()
         if employee is None:
@@ -424,6 +781,7 @@ def employee_detail_page(request: Request, employee_id: int) -> HTMLResponse:
                 "employee": employee,
                 "reviews": reviews,
             },
+            headers=version.headers(),
         )
     finally:
         db.close()
@@ -1,125 +1,389 @@
 import re
+from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import Iterable, Optional
 
 from sqlalchemy.orm import Session
 
 from app import models
+from app.events import EVENT_MENTION, MAX_EVENT_ITEMS, publish
 
 
-def _contains_phrase(text_lower: str, phrase: str) -> bool:
-    phrase = phrase.strip().lower()
-    if not phrase:
-        return False
-    pattern = r"\b" + re.escape(phrase).replace(r"\ ", r"\s+") + r"\b"
-    return re.search(pattern, text_lower) is not None
+# Common short forms, keyed by the formal name. Matching works in either direction and between
+# siblings, so "Jim" finds an employee listed as "Jamie".
+NICKNAMES = {
+    "alexander": ["alex", "xander"],
+    "alexandra": ["alex", "lexi", "sandra"],
+    "andrew": ["andy", "drew"],
+    "anthony": ["tony"],
+    "benjamin": ["ben", "benny"],
+    "catherine": ["cathy", "kate", "katie"],
+    "charles": ["charlie", "chuck"],
+    "christopher": ["chris", "topher"],
+    "christina": ["chris", "tina"],
+    "daniel": ["dan", "danny"],
+    "david": ["dave", "davey"],
+    "deborah": ["deb", "debbie"],
+    "dorothy": ["dot", "dottie"],
+    "edward": ["eddie", "ted", "ned"],
+    "elizabeth": ["eliza", "liz", "lizzie", "beth", "betty"],
+    "gregory": ["greg"],
+    "isabella": ["bella", "izzy"],
+    "james": ["jim", "jimmy", "jamie"],
+    "jennifer": ["jen", "jenn", "jenny"],
+    "jessica": ["jess", "jessie"],
+    "john": ["jack", "johnny", "jon"],
+    "jonathan": ["jon", "johnny"],
+    "joseph": ["joe", "joey"],
+    "katherine": ["kate", "katie", "kathy", "kat"],
+    "kimberly": ["kim"],
+    "lawrence": ["larry"],
+    "margaret": ["maggie", "meg", "peggy"],
+    "matthew": ["matt"],
+    "michael": ["mike", "mikey", "mick"],
+    "nicholas": ["nick", "nicky"],
+    "patricia": ["pat", "patty", "trish"],
+    "patrick": ["pat", "paddy"],
+    "rebecca": ["becky", "becca"],
+    "richard": ["rich", "rick", "ricky", "dick"],
+    "robert": ["rob", "robbie", "bob", "bobby"],
+    "samantha": ["sam", "sammy"],
+    "samuel": ["sam", "sammy"],
+    "stephanie": ["steph"],
+    "stephen": ["steve", "stevie"],
+    "steven": ["steve", "stevie"],
+    "susan": ["sue", "susie"],
+    "theodore": ["theo", "ted", "teddy"],
+    "thomas": ["tom", "tommy"],
+    "timothy": ["tim", "timmy"],
+    "victoria": ["vicky", "tori"],
+    "william": ["will", "bill", "billy", "liam"],
+    "zachary": ["zach", "zack"],
+}
 
+# Capitalized words that are never names, even when they sound like one.
+STOPWORDS = {
+    "about", "after", "again", "all", "also", "and", "any", "are", "because", "been", "before",
+    "best", "but", "came", "can", "customer", "did", "does", "don't", "each", "even", "every",
+    "excellent", "for", "friendly", "from", "good", "great", "had", "has", "have", "her", "here",
+    "him", "his", "how", "just", "made", "manager", "many", "more", "most", "much", "never", "nice",
+    "not", "now", "one", "only", "our", "overall", "really", "service", "she", "since", "some",
+    "staff", "still", "team", "thank", "thanks", "that", "the", "their", "them", "then", "there",
+    "they", "this", "very", "was", "we're", "were", "what", "when", "which", "while", "who", "will",
+    "with", "would", "you", "your",
+}
 
-def _contains_word(text_lower: str, word: str) -> bool:
-    word = word.strip().lower()
-    if not word:
-        return False
-    pattern = r"\b" + re.escape(word) + r"\b"
-    return re.search(pattern, text_lower) is not None
+# Nicknames that are also ordinary English words. At the start of a sentence their capital letter says
+# nothing ("Bill was higher than quoted"), so there they are stored as ambiguous and go to triage.
+NICKNAME_WORDS = {"bill", "bob", "chuck", "dick", "dot", "drew", "jack", "nick", "pat", "patty", "rich", "rob", "sue"}
 
+WORD_RE = re.compile(r"[^\W\d_]+(?:['’][^\W\d_]+)*")
+MIN_NICKNAME_TOKEN_LENGTH = 3
+MIN_FUZZY_TOKEN_LENGTH = 4
+FUZZY_MIN_RATIO = 0.8
 
-def run_employee_mention_detection(db: Session) -> int:
+# confidence_score by how a mention was found; fuzzy matches scale with similarity.
+CONFIDENCE_FULL_NAME = 1.0
+CONFIDENCE_FIRST_NAME = 0.9
+CONFIDENCE_NICKNAME = 0.8
+CONFIDENCE_FUZZY = 0.75
+CONFIDENCE_LAST_INITIAL_BONUS = 0.05
+
+SOUNDEX_CODES = {
+    **dict.fromkeys("bfpv", "1"),
+    **dict.fromkeys("cgjkqsxz", "2"),
+    **dict.fromkeys("dt", "3"),
+    "l": "4",
+    **dict.fromkeys("mn", "5"),
+    "r": "6",
+}
+
+
+def name_tokens(text: str) -> list[tuple[str, int, int]]:
+    # (lowercased word, start, end); a trailing possessive is dropped so "Sam's" reads as "sam".
+    tokens = []
+    for match in WORD_RE.finditer(text):
+        word = match.group(0).replace("’", "'")
+        end = match.end()
+        if word.lower().endswith("'s"):
+            word = word[:-2]
+            end -= 2
+        tokens.append((word.lower(), match.start(), end))
+    return tokens
+
+
+@lru_cache(maxsize=8192)
+def soundex(word: str) -> str:
+    letters = [char for char in word.lower() if char.isascii() and char.isalpha()]
+    if not letters:
+        return ""
+    code = letters[0].upper()
+    previous = SOUNDEX_CODES.get(letters[0], "")
+    for char in letters[1:]:
+        digit = SOUNDEX_CODES.get(char, "")
+        if digit and digit != previous:
+            code += digit
+        # h and w do not separate letters with the same code; vowels do.
+        if char not in "hw":
+            previous = digit
+    return (code + "000")[:4]
+
+
+def nickname_groups() -> dict[str, set[str]]:
+    groups: dict[str, set[str]] = {}
+    for formal, short_forms in NICKNAMES.items():
+        names = {formal, *short_forms}
+        for name in names:
+            groups.setdefault(name, set()).update(names - {name})
+    return groups
+
+
+NICKNAME_GROUPS = nickname_groups()
+
+
+def opens_sentence(text: str, start: int) -> bool:
+    before = text[:start].rstrip(" \t\r\n\"'“‘(")
+    return not before or before[-1] in ".!?"
+
+
+class NameMatch:
+    # confirmed=False: a NICKNAME_WORDS hit that opens a sentence; it is stored as ambiguous.
+    def __init__(
+        self, employees: list[models.Employee], confidence: float, mention_text: str, confirmed: bool = True
+    ) -> None:
+        self.employees = employees
+        self.confidence = confidence
+        self.mention_text = mention_text
+        self.confirmed = confirmed
+
+
+class RosterIndex:
+    # Built once per scan: every lookup is a dict hit on a review token, so the cost grows with the
+    # review length rather than with tokens x employees.
+    def __init__(self, employees: list[models.Employee]) -> None:
+        self.full_names: dict[str, list[tuple[list[str], models.Employee]]] = {}
+        self.first_names: dict[str, list[models.Employee]] = {}
+        self.phonetic: dict[str, set[str]] = {}
+        self.last_initials: dict[int, str] = {}
+        for employee in employees:
+            words = [word for word, _, _ in name_tokens(employee.full_name)]
+            if not words:
+                continue
+            self.full_names.setdefault(words[0], []).append((words, employee))
+            self.first_names.setdefault(words[0], []).append(employee)
+            self.phonetic.setdefault(soundex(words[0]), set()).add(words[0])
+            if len(words) > 1:
+                self.last_initials[employee.id] = words[-1][0]
+
+    def full_name_matches(self, text: str, tokens: list[tuple[str, int, int]]) -> list[NameMatch]:
+        matches = []
+        words = [word for word, _, _ in tokens]
+        for position, word in enumerate(words):
+            for name_words, employee in self.full_names.get(word, ()):
+                if words[position : position + len(name_words)] == name_words:
+                    end = tokens[position + len(name_words) - 1][2]
+                    matches.append(NameMatch([employee], CONFIDENCE_FULL_NAME, text[tokens[position][1] : end]))
+        return matches
+
+    def candidates(self, text: str, word: str, start: int) -> tuple[list[models.Employee], float]:
+        exact = self.first_names.get(word)
+        if exact:
+            return exact, CONFIDENCE_FIRST_NAME
+        # Nicknames and misspellings only count for capitalized words, so "will" and "mark" stay verbs.
+        if len(word) < MIN_NICKNAME_TOKEN_LENGTH or word in STOPWORDS or not text[start].isupper():
+            return [], 0.0
+        nickname_hits = [
+            employee for name in sorted(NICKNAME_GROUPS.get(word, ())) for employee in self.first_names.get(name, ())
+        ]
+        if nickname_hits:
+            return nickname_hits, CONFIDENCE_NICKNAME
+        if len(word) < MIN_FUZZY_TOKEN_LENGTH:
+            return [], 0.0
+        best_ratio = 0.0
+        best: list[models.Employee] = []
+        for name in sorted(self.phonetic.get(soundex(word), ())):
+            # "Same" is not a misspelled "Sam", nor "Dani" a misspelled "Daniel".
+            if name.startswith(word) or word.startswith(name):
+                continue
+            ratio = SequenceMatcher(None, word, name).ratio()
+            if ratio > best_ratio:
+                best_ratio, best = ratio, list(self.first_names[name])
+            elif ratio == best_ratio:
+                best.extend(self.first_names[name])
+        if best_ratio < FUZZY_MIN_RATIO:
+            return [], 0.0
+        return best, round(CONFIDENCE_FUZZY * best_ratio, 2)
+
+    def first_name_matches(self, text: str, tokens: list[tuple[str, int, int]]) -> list[NameMatch]:
+        matches = []
+        for position, (word, start, end) in enumerate(tokens):
+            employees, confidence = self.candidates(text, word, start)
+            if not employees:
+                continue
+            confirmed = (
+                confidence != CONFIDENCE_NICKNAME or word not in NICKNAME_WORDS or not opens_sentence(text, start)
+            )
+            # "Jamie C." narrows the candidates to employees whose last name starts with C.
+            if position + 1 < len(tokens):
+                initial, initial_start, initial_end = tokens[position + 1]
+                if len(initial) == 1 and text[initial_start].isupper():
+                    narrowed = [employee for employee in employees if self.last_initials.get(employee.id) == initial]
+                    if narrowed:
+                        employees = narrowed
+                        confirmed = True
+                        confidence = round(min(confidence + CONFIDENCE_LAST_INITIAL_BONUS, CONFIDENCE_FULL_NAME), 2)
+                        end = initial_end + 1 if text[initial_end : initial_end + 1] == "." else initial_end
+            matches.append(NameMatch(employees, confidence, text[start:end], confirmed))
+        return matches
+
+
+def detect_mentions(roster: RosterIndex, text: str) -> list[tuple[Optional[int], bool, NameMatch]]:
+    # (employee_id, ambiguous, match) for each mention to store; an ambiguous one has no employee_id.
+    tokens = name_tokens(text)
+    matches = roster.full_name_matches(text, tokens) or roster.first_name_matches(text, tokens)
+    if not matches:
+        return []
+
+    resolved = {match.employees[0].id for match in matches if len(match.employees) == 1 and match.confirmed}
+    # A bare "Jamie" is settled if the same review already names one of the Jamies ("Jamie C.").
+    ambiguous = [
+        match
+        for match in matches
+        if (len(match.employees) > 1 or not match.confirmed)
+        and not resolved & {employee.id for employee in match.employees}
+    ]
+    if ambiguous:
+        return [(None, True, ambiguous[0])]
+
+    # Several spellings of the same person keep the most confident one.
+    best: dict[int, NameMatch] = {}
+    for match in matches:
+        if len(match.employees) > 1 or not match.confirmed:
+            continue
+        employee_id = match.employees[0].id
+        if employee_id not in best or match.confidence > best[employee_id].confidence:
+            best[employee_id] = match
+    return [(employee_id, False, best[employee_id]) for employee_id in sorted(best)]
+
+
+def run_employee_mention_detection(db: Session, review_ids: Optional[Iterable[int]] = None) -> int:
+    # review_ids=None scans every review; the import pipeline passes only new or changed IDs.
     employees = db.query(models.Employee).all()
-    reviews = db.query(models.Review).all()
-
-    existing_rows = (
-        db.query(
-            models.EmployeeMention.review_id,
-            models.EmployeeMention.employee_id,
-            models.EmployeeMention.ambiguity_flag,
-            models.EmployeeMention.detection_method,
-        )
-        .filter(models.EmployeeMention.detection_method == "auto")
-        .all()
+    reviews_query = db.query(models.Review)
+    existing_query = db.query(
+        models.EmployeeMention.review_id,
+        models.EmployeeMention.employee_id,
+        models.EmployeeMention.ambiguity_flag,
+        models.EmployeeMention.detection_method,
+    ).filter(models.EmployeeMention.detection_method == "auto")
+    manual_query = db.query(models.EmployeeMention.review_id).filter(
+        models.EmployeeMention.detection_method == "manual"
     )
+    if review_ids is not None:
+        review_ids = list(review_ids)
+        if not review_ids:
+            return 0
+        reviews_query = reviews_query.filter(models.Review.id.in_(review_ids))
+        existing_query = existing_query.filter(models.EmployeeMention.review_id.in_(review_ids))
+        manual_query = manual_query.filter(models.EmployeeMention.review_id.in_(review_ids))
+
+    reviews = reviews_query.all()
     existing = {
         (row.review_id, row.employee_id, bool(row.ambiguity_flag), row.detection_method)
-        for row in existing_rows
+        for row in existing_query.all()
     }
+    manual_review_ids = {row.review_id for row in manual_query.distinct().all()}
 
     created = 0
-    for review in reviews:
-        has_manual_override = (
-            db.query(models.EmployeeMention.id)
-            .filter(models.EmployeeMention.review_id == review.id)
-            .filter(models.EmployeeMention.detection_method == "manual")
-            .first()
-            is not None
+    mentioned_review_ids: set[int] = set()
+    roster = RosterIndex(employees)
+
+    def add_mention(review_id: int, employee_id: Optional[int], ambiguous: bool, match: NameMatch) -> None:
+        nonlocal created
+        key = (review_id, employee_id, ambiguous, "auto")
+        if key in existing:
+            return
+        db.add(
+            models.EmployeeMention(
+                review_id=review_id,
+                employee_id=employee_id,
+                detection_method="auto",
+                ambiguity_flag=ambiguous,
+                confidence_score=match.confidence,
+                mention_text=match.mention_text,
+            )
         )
-        if has_manual_override:
-            continue
+        existing.add(key)
+        created += 1
+        mentioned_review_ids.add(review_id)
 
-        text_lower = (review.review_text or "").lower()
-        if not text_lower.strip():
+    for review in reviews:
+        if review.id in manual_review_ids:
             continue
 
-        full_name_matches = [
-            employee for employee in employees if _contains_phrase(text_lower, employee.full_name)
-        ]
-        if full_name_matches:
-            unique_ids = sorted({employee.id for employee in full_name_matches})
-            for employee_id in unique_ids:
-                key = (review.id, employee_id, False, "auto")
-                if key in existing:
-                    continue
-                db.add(
-                    models.EmployeeMention(
-                        review_id=review.id,
-                        employee_id=employee_id,
-                        detection_method="auto",
-                        ambiguity_flag=False,
-                        confidence_score=None,
-                    )
-                )
-                existing.add(key)
-                created += 1
+        text = review.review_text or ""
+        if not text.strip():
             continue
+        for employee_id, ambiguous, match in detect_mentions(roster, text):
+            add_mention(review.id, employee_id, ambiguous, match)
 
-        first_name_hits: dict[str, list[models.Employee]] = {}
-        for employee in employees:
-            first_name = employee.full_name.split()[0].strip().lower()
-            if _contains_word(text_lower, first_name):
-                first_name_hits.setdefault(first_name, []).append(employee)
+    db.commit()
+    if created:
+        publish(EVENT_MENTION, {"created": created, "review_ids": sorted(mentioned_review_ids)[:MAX_EVENT_ITEMS]})
+    return created
 
-        if not first_name_hits:
-            continue
 
-        has_ambiguous_first_name = any(len(matches) > 1 for matches in first_name_hits.values())
-        if has_ambiguous_first_name:
-            key = (review.id, None, True, "auto")
-            if key not in existing:
-                db.add(
-                    models.EmployeeMention(
-                        review_id=review.id,
-                        employee_id=None,
-                        detection_method="auto",
-                        ambiguity_flag=True,
-                        confidence_score=None,
-                    )
-                )
-                existing.add(key)
-                created += 1
-            continue
+MENTION_ASSIGNMENT_BATCH_SIZE = 500
 
-        unique_ids = sorted({matches[0].id for matches in first_name_hits.values()})
-        for employee_id in unique_ids:
-            key = (review.id, employee_id, False, "auto")
-            if key in existing:
-                continue
-            db.add(
-                models.EmployeeMention(
-                    review_id=review.id,
-                    employee_id=employee_id,
-                    detection_method="auto",
-                    ambiguity_flag=False,
-                    confidence_score=None,
-                )
-            )
-            existing.add(key)
-            created += 1
 
+def apply_mention_assignments(db: Session, assignments: Iterable[tuple[int, int]]) -> tuple[int, int]:
+    # Manual (review_id, employee_id) assignments applied in one transaction. As with a single manual
+    # override, each assigned review loses its auto mentions. Returns (applied, skipped).
+    pairs = sorted(set(assignments))
+    review_ids = sorted({review_id for review_id, _ in pairs})
+    employee_ids = sorted({employee_id for _, employee_id in pairs})
+    known_review_ids: set[int] = set()
+    known_employee_ids: set[int] = set()
+    for start in range(0, len(review_ids), MENTION_ASSIGNMENT_BATCH_SIZE):
+        batch = review_ids[start : start + MENTION_ASSIGNMENT_BATCH_SIZE]
+        known_review_ids.update(row.id for row in db.query(models.Review.id).filter(models.Review.id.in_(batch)))
+    for start in range(0, len(employee_ids), MENTION_ASSIGNMENT_BATCH_SIZE):
+        batch = employee_ids[start : start + MENTION_ASSIGNMENT_BATCH_SIZE]
+        known_employee_ids.update(
+            row.id for row in db.query(models.Employee.id).filter(models.Employee.id.in_(batch))
+        )
+    valid = [
+        (review_id, employee_id)
+        for review_id, employee_id in pairs
+        if review_id in known_review_ids and employee_id in known_employee_ids
+    ]
+
+    valid_review_ids = sorted({review_id for review_id, _ in valid})
+    existing: set[tuple[int, int]] = set()
+    for start in range(0, len(valid_review_ids), MENTION_ASSIGNMENT_BATCH_SIZE):
+        batch = valid_review_ids[start : start + MENTION_ASSIGNMENT_BATCH_SIZE]
+        db.query(models.EmployeeMention).filter(
+            models.EmployeeMention.review_id.in_(batch),
+            models.EmployeeMention.detection_method == "auto",
+        ).delete(synchronize_session=False)
+        existing.update(
+            (row.review_id, row.employee_id)
+            for row in db.query(models.EmployeeMention.review_id, models.EmployeeMention.employee_id).filter(
+                models.EmployeeMention.review_id.in_(batch)
+            )
+        )
+    rows = [
+        {
+            "review_id": review_id,
+            "employee_id": employee_id,
+            "detection_method": "manual",
+            "ambiguity_flag": False,
+            "confidence_score": None,
+        }
+        for review_id, employee_id in valid
+        if (review_id, employee_id) not in existing
+    ]
+    if rows:
+        db.bulk_insert_mappings(models.EmployeeMention, rows)
     db.commit()
-    return created
+    return len(valid), len(pairs) - len(valid)
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Boolean, DateTime, Float, ForeignKey, Integer, String, Text
+from sqlalchemy import Boolean, DateTime, Float, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db import Base
@@ -86,9 +86,58 @@ class AlertRule(Base):
 
 class AlertLog(Base):
     __tablename__ = "alert_log"
+    __table_args__ = (
+        # Keyset pagination on /alerts walks these newest-first.
+        Index("ix_alert_log_triggered_at_id", "triggered_at", "id"),
+        Index("ix_alert_log_status_triggered_at_id", "status", "triggered_at", "id"),
+        Index("ix_alert_log_rule_triggered_at_id", "alert_rule_id", "triggered_at", "id"),
+        Index("ix_alert_log_location_triggered_at_id", "location_id", "triggered_at", "id"),
+        Index("ix_alert_log_alert_type_triggered_at_id", "alert_type", "triggered_at", "id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     alert_rule_id: Mapped[int] = mapped_column(ForeignKey("alert_rules.id"), nullable=False, index=True)
     review_id: Mapped[int] = mapped_column(ForeignKey("reviews.id"), nullable=False, index=True)
+    # Copied from the review so the /alerts location filter can walk an alert_log index.
+    location_id: Mapped[int] = mapped_column(ForeignKey("locations.id"), nullable=True)
+    # The rule's name, copied for the same reason: every location has its own negative_review rule, so
+    # filtering by rule id would be an IN list that has to sort every match.
+    alert_type: Mapped[str] = mapped_column(String(255), nullable=True)
     triggered_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
     status: Mapped[str] = mapped_column(String(64), nullable=False, default="triggered")
+
+
+class ArchivedAlert(Base):
+    # (review, rule) pairs whose alert_log rows were archived, so the scan does not alert on them again.
+    __tablename__ = "archived_alerts"
+
+    review_id: Mapped[int] = mapped_column(ForeignKey("reviews.id"), primary_key=True)
+    alert_rule_id: Mapped[int] = mapped_column(ForeignKey("alert_rules.id"), primary_key=True)
+
+
+class ReviewEvent(Base):
+    __tablename__ = "review_events"
+    # AUTOINCREMENT: ids are never reused after deletes, so events written after a reset or a
+    # retention run always sort after pipeline_cursors.last_event_id.
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    review_id: Mapped[int] = mapped_column(ForeignKey("reviews.id"), nullable=False, index=True)
+    event_type: Mapped[str] = mapped_column(String(32), nullable=False, default="created")
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class PipelineCursor(Base):
+    __tablename__ = "pipeline_cursors"
+
+    consumer: Mapped[str] = mapped_column(String(64), primary_key=True)
+    last_event_id: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class TableVersion(Base):
+    __tablename__ = "table_versions"
+
+    table_name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
@@ -0,0 +1,110 @@
+from datetime import datetime
+from typing import Iterable
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app import models
+from app.alerts import run_negative_review_scan
+from app.db import SHARDING_ENABLED, map_per_shard
+from app.events import EVENT_DAILY_COUNTS, EVENT_REVIEW, MAX_EVENT_ITEMS, has_subscribers, publish
+from app.mentions import run_employee_mention_detection
+from app.stats import merge_review_summaries, review_summary
+
+EVENT_REVIEW_CREATED = "created"
+EVENT_REVIEW_UPDATED = "updated"
+PIPELINE_CONSUMER = "review_pipeline"
+PIPELINE_BATCH_SIZE = 500
+
+
+def emit_review_events(db: Session, review_ids: Iterable[int], event_type: str) -> int:
+    rows = [{"review_id": review_id, "event_type": event_type} for review_id in review_ids]
+    if rows:
+        db.bulk_insert_mappings(models.ReviewEvent, rows)
+    return len(rows)
+
+
+def get_cursor(db: Session, consumer: str) -> models.PipelineCursor:
+    cursor = db.get(models.PipelineCursor, consumer)
+    if cursor is None:
+        cursor = models.PipelineCursor(consumer=consumer, last_event_id=0)
+        db.add(cursor)
+        db.flush()
+    return cursor
+
+
+def process_review_batch(db: Session, created_ids: list[int], updated_ids: list[int]) -> None:
+    if updated_ids:
+        # Changed text can add or remove names, so auto mentions are re-detected from scratch.
+        db.query(models.EmployeeMention).filter(
+            models.EmployeeMention.review_id.in_(updated_ids),
+            models.EmployeeMention.detection_method == "auto",
+        ).delete(synchronize_session=False)
+        db.flush()
+    review_ids = created_ids + updated_ids
+    run_employee_mention_detection(db, review_ids)
+    run_negative_review_scan(db, review_ids)
+
+
+def publish_review_updates(db: Session, created_ids: list[int], updated_ids: list[int]) -> None:
+    # Live dashboards only; skip the aggregates entirely when nobody is listening.
+    if not has_subscribers():
+        return
+    review_ids = created_ids + updated_ids
+    publish(
+        EVENT_REVIEW,
+        {"created": len(created_ids), "updated": len(updated_ids), "review_ids": review_ids[:MAX_EVENT_ITEMS]},
+    )
+
+    day_column = func.date(models.Review.created_at)
+    days = [row.day for row in db.query(day_column.label("day")).filter(models.Review.id.in_(review_ids)).distinct()]
+    # Each shard runs its own pipeline, but the dashboard shows all locations: publish merged totals.
+    if SHARDING_ENABLED:
+        summaries = map_per_shard(lambda shard_db: review_summary(shard_db, [], days))
+    else:
+        summaries = [review_summary(db, [], days)]
+    summary = merge_review_summaries(summaries)
+    publish(
+        EVENT_DAILY_COUNTS,
+        {
+            "total_reviews": summary["total_reviews"],
+            "average_rating": summary["average_rating"],
+            "negative_reviews": summary["negative_reviews"],
+            "positive_reviews": summary["positive_reviews"],
+            "days": {row["day"]: row["count"] for row in summary["reviews_by_day"]},
+        },
+    )
+
+
+def run_review_pipeline(db: Session, batch_size: int = PIPELINE_BATCH_SIZE) -> int:
+    processed = 0
+    while True:
+        cursor = get_cursor(db, PIPELINE_CONSUMER)
+        events = (
+            db.query(models.ReviewEvent.id, models.ReviewEvent.review_id, models.ReviewEvent.event_type)
+            .filter(models.ReviewEvent.id > cursor.last_event_id)
+            .order_by(models.ReviewEvent.id.asc())
+            .limit(batch_size)
+            .all()
+        )
+        if not events:
+            db.commit()
+            return processed
+
+        created_ids: set[int] = set()
+        updated_ids: set[int] = set()
+        for event in events:
+            if event.event_type == EVENT_REVIEW_UPDATED:
+                updated_ids.add(event.review_id)
+            else:
+                created_ids.add(event.review_id)
+        created_ids -= updated_ids
+
+        process_review_batch(db, sorted(created_ids), sorted(updated_ids))
+
+        cursor = get_cursor(db, PIPELINE_CONSUMER)
+        cursor.last_event_id = events[-1].id
+        cursor.updated_at = datetime.utcnow()
+        db.commit()
+        publish_review_updates(db, sorted(created_ids), sorted(updated_ids))
+        processed += len(created_ids) + len(updated_ids)
@@ -0,0 +1,167 @@
+import argparse
+import gzip
+import json
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import and_, exists, text
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session, aliased
+
+from app import models
+from app.db import init_db, run_per_shard
+from app.pipeline import PIPELINE_CONSUMER
+
+RETENTION_BATCH_SIZE = 500
+
+
+def retention_days() -> int:
+    try:
+        return max(int(os.getenv("RETENTION_DAYS", "365")), 1)
+    except ValueError:
+        return 365
+
+
+def archive_dir() -> Path:
+    return Path(os.getenv("ARCHIVE_DIR", "./archive"))
+
+
+def retention_policies(db: Session, cutoff: datetime) -> list[tuple[type, object]]:
+    # (model, filter) pairs; rows matching the filter are archived and deleted.
+    consumed_event_id = (
+        db.query(models.PipelineCursor.last_event_id)
+        .filter(models.PipelineCursor.consumer == PIPELINE_CONSUMER)
+        .scalar()
+        or 0
+    )
+    # The newest version of each review is kept so the importer can keep numbering from it.
+    newer_version = aliased(models.ReviewVersion)
+    superseded_version = exists().where(
+        newer_version.review_id == models.ReviewVersion.review_id,
+        newer_version.version_number > models.ReviewVersion.version_number,
+    )
+    # Only mentions whose review is gone: detection would recreate any other mention on its next full run.
+    orphaned_mention = ~exists().where(models.Review.id == models.EmployeeMention.review_id)
+    return [
+        (models.AlertLog, models.AlertLog.triggered_at < cutoff),
+        (models.ReviewVersion, and_(models.ReviewVersion.captured_at < cutoff, superseded_version)),
+        (models.EmployeeMention, orphaned_mention),
+        # review_events ids come from AUTOINCREMENT, so emptying the table does not restart them.
+        (
+            models.ReviewEvent,
+            and_(models.ReviewEvent.created_at < cutoff, models.ReviewEvent.id <= consumed_event_id),
+        ),
+    ]
+
+
+def row_to_dict(row) -> dict[str, object]:
+    record = {}
+    for column in row.__table__.columns:
+        value = getattr(row, column.key)
+        record[column.key] = value.isoformat() if isinstance(value, datetime) else value
+    return record
+
+
+def archive_path(db: Session, table_name: str, started_at: datetime) -> Path:
+    database = Path(db.get_bind().url.database or "memory").stem
+    return archive_dir() / f"{database}-{table_name}-{started_at:%Y%m%dT%H%M%S}.ndjson.gz"
+
+
+def remember_archived_alerts(db: Session, rows: list[models.AlertLog]) -> None:
+    # Written in the same transaction as the delete, so a later full scan still skips these pairs.
+    pairs = {(row.review_id, row.alert_rule_id) for row in rows}
+    db.execute(
+        insert(models.ArchivedAlert)
+        .values([{"review_id": review_id, "alert_rule_id": rule_id} for review_id, rule_id in sorted(pairs)])
+        .on_conflict_do_nothing()
+    )
+
+
+def archive_and_delete(db: Session, model, condition, started_at: datetime, batch_size: int) -> int:
+    # Small batches, each in its own transaction, so importers and scans get the write lock in between.
+    moved = 0
+    last_id = 0
+    path: Optional[Path] = None
+    primary_key = model.__mapper__.primary_key[0]
+    while True:
+        rows = (
+            db.query(model)
+            .filter(condition, primary_key > last_id)
+            .order_by(primary_key)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            break
+        if path is None:
+            path = archive_path(db, model.__tablename__, started_at)
+            path.parent.mkdir(parents=True, exist_ok=True)
+        with gzip.open(path, "at", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(row_to_dict(row)) + "\n")
+        if model is models.AlertLog:
+            remember_archived_alerts(db, rows)
+        ids = [getattr(row, primary_key.key) for row in rows]
+        last_id = ids[-1]
+        db.query(model).filter(primary_key.in_(ids)).delete(synchronize_session=False)
+        db.commit()
+        db.expunge_all()
+        moved += len(rows)
+    return moved
+
+
+def reclaim_space(db: Session, full_vacuum: bool = False) -> str:
+    bind = db.get_bind()
+    with bind.connect() as conn:
+        auto_vacuum = conn.execute(text("PRAGMA auto_vacuum")).scalar()
+    if auto_vacuum == 2:
+        with bind.connect() as conn:
+            conn.execute(text("PRAGMA incremental_vacuum"))
+            conn.commit()
+        return "incremental_vacuum"
+    if not full_vacuum:
+        return "skipped"
+    with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        # Switching to incremental mode takes effect with this VACUUM; later runs reclaim pages cheaply.
+        conn.execute(text("PRAGMA auto_vacuum = INCREMENTAL"))
+        conn.execute(text("VACUUM"))
+    return "vacuum"
+
+
+def run_retention(
+    db: Session,
+    days: Optional[int] = None,
+    batch_size: int = RETENTION_BATCH_SIZE,
+    full_vacuum: bool = False,
+) -> int:
+    started_at = datetime.utcnow()
+    cutoff = started_at - timedelta(days=days or retention_days())
+    moved = 0
+    for model, condition in retention_policies(db, cutoff):
+        count = archive_and_delete(db, model, condition, started_at, batch_size)
+        if count:
+            print(f"Archived {count} rows from {model.__tablename__}")
+        moved += count
+    if moved or full_vacuum:
+        reclaim_space(db, full_vacuum=full_vacuum)
+    return moved
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Archive and delete rows older than the retention horizon.")
+    parser.add_argument("--days", type=int, help="Retention horizon (default: RETENTION_DAYS or 365).")
+    parser.add_argument("--batch-size", type=int, default=RETENTION_BATCH_SIZE)
+    parser.add_argument("--vacuum", action="store_true", help="Run a full VACUUM if incremental vacuum is off.")
+    args = parser.parse_args()
+
+    init_db()
+    moved = run_per_shard(
+        lambda db: run_retention(db, days=args.days, batch_size=args.batch_size, full_vacuum=args.vacuum)
+    )
+    print(f"Retention complete: archived={moved}")
+
+
+if __name__ == "__main__":
+    main()
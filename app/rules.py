@@ -0,0 +1,198 @@
+import json
+import re
+from typing import Iterable, Optional
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from app import models
+
+# condition_json keys understood by the rule engine, e.g.
+# {"rating_lte": 2}, {"keywords_any": ["rude", "late"], "location_ids": [1, 2]},
+# {"employee_mentioned": true} or {"employee_mentioned": [3, 7]}.
+CONDITION_KEYS = {
+    "rating_lte",
+    "rating_gte",
+    "keywords_any",
+    "employee_mentioned",
+    "location_ids",
+    "all_locations",
+}
+
+
+def normalize_keyword(keyword: str) -> str:
+    return " ".join(keyword.lower().split())
+
+
+class CompiledRule:
+    def __init__(
+        self,
+        rule_id: int,
+        name: str,
+        location_ids: Optional[set[int]],
+        rating_lte: Optional[float] = None,
+        rating_gte: Optional[float] = None,
+        keywords: Optional[set[str]] = None,
+        employee_mentioned: bool = False,
+        employee_ids: Optional[set[int]] = None,
+    ) -> None:
+        self.id = rule_id
+        self.name = name
+        self.location_ids = location_ids
+        self.rating_lte = rating_lte
+        self.rating_gte = rating_gte
+        self.keywords = keywords or set()
+        self.employee_mentioned = employee_mentioned
+        self.employee_ids = employee_ids or set()
+
+    def matches(self, rating: float, matched_keywords: set[str], mentioned_ids: set[int]) -> bool:
+        if self.rating_lte is not None and rating > self.rating_lte:
+            return False
+        if self.rating_gte is not None and rating < self.rating_gte:
+            return False
+        if self.keywords and not (self.keywords & matched_keywords):
+            return False
+        if self.employee_ids and not (self.employee_ids & mentioned_ids):
+            return False
+        if self.employee_mentioned and not mentioned_ids:
+            return False
+        return True
+
+    def sql_filter(self):
+        clauses = []
+        if self.location_ids is not None:
+            clauses.append(models.Review.location_id.in_(sorted(self.location_ids)))
+        if self.rating_lte is not None:
+            clauses.append(models.Review.rating <= self.rating_lte)
+        if self.rating_gte is not None:
+            clauses.append(models.Review.rating >= self.rating_gte)
+        return and_(*clauses) if clauses else None
+
+
+def condition_number(condition: dict, key: str) -> Optional[float]:
+    value = condition.get(key)
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"{key} must be a number")
+    return float(value)
+
+
+def condition_ids(value: object, key: str) -> set[int]:
+    if not isinstance(value, list) or any(isinstance(item, bool) or not isinstance(item, int) for item in value):
+        raise ValueError(f"{key} must be a list of integer IDs")
+    return set(value)
+
+
+def condition_keywords(value: object) -> set[str]:
+    # A bare string would otherwise be iterated letter by letter.
+    if not isinstance(value, list) or any(not isinstance(item, str) for item in value):
+        raise ValueError("keywords_any must be a list of strings")
+    return {normalize_keyword(item) for item in value if item.strip()}
+
+
+def compile_rule(rule: models.AlertRule) -> Optional[CompiledRule]:
+    try:
+        condition = json.loads(rule.condition_json or "{}")
+        if not isinstance(condition, dict) or not (CONDITION_KEYS & condition.keys()):
+            print(f"Alert rule {rule.id} ({rule.name}) has no usable conditions, skipping.")
+            return None
+
+        location_ids: Optional[set[int]] = {rule.location_id}
+        all_locations = condition.get("all_locations", False)
+        if not isinstance(all_locations, bool):
+            raise ValueError("all_locations must be true or false")
+        if all_locations:
+            location_ids = None
+        elif condition.get("location_ids"):
+            location_ids = condition_ids(condition["location_ids"], "location_ids")
+
+        mentioned = condition.get("employee_mentioned", False)
+        if isinstance(mentioned, list):
+            employee_ids = condition_ids(mentioned, "employee_mentioned")
+        elif isinstance(mentioned, bool):
+            employee_ids = set()
+        else:
+            raise ValueError("employee_mentioned must be true, false or a list of employee IDs")
+        keywords_any = condition.get("keywords_any")
+        keywords = condition_keywords(keywords_any) if keywords_any is not None else set()
+
+        return CompiledRule(
+            rule_id=rule.id,
+            name=rule.name,
+            location_ids=location_ids,
+            rating_lte=condition_number(condition, "rating_lte"),
+            rating_gte=condition_number(condition, "rating_gte"),
+            keywords=keywords,
+            employee_mentioned=mentioned is True,
+            employee_ids=employee_ids,
+        )
+    except ValueError:
+        print(f"Alert rule {rule.id} ({rule.name}) has invalid condition_json, skipping.")
+        return None
+
+
+class KeywordMatcher:
+    # One alternation over every rule's keywords, so each review is scanned once regardless of rule count.
+    def __init__(self, keywords: Iterable[str]) -> None:
+        self.keywords = sorted(set(keywords), key=len, reverse=True)
+        self.pattern = None
+        if self.keywords:
+            alternation = "|".join(re.escape(keyword).replace(r"\ ", r"\s+") for keyword in self.keywords)
+            # Zero-width lookahead, so a match at one word does not consume the next: "slow service charge"
+            # reports both "slow service" and "service charge".
+            self.pattern = re.compile(r"\b(?=(" + alternation + r")\b)")
+        # Only the longest keyword starting at a word is captured; this adds the shorter ones that
+        # start there too ("slow" within "slow service").
+        self.contained: dict[str, set[str]] = {}
+        for keyword in self.keywords:
+            self.contained[keyword] = {
+                other
+                for other in self.keywords
+                if other != keyword and re.search(r"\b" + re.escape(other) + r"\b", keyword)
+            }
+
+    def match(self, text_lower: str) -> set[str]:
+        if self.pattern is None:
+            return set()
+        found: set[str] = set()
+        for hit in self.pattern.finditer(text_lower):
+            keyword = normalize_keyword(hit.group(1))
+            found.add(keyword)
+            found |= self.contained.get(keyword, set())
+        return found
+
+
+class RuleSet:
+    def __init__(self, rules: list[CompiledRule]) -> None:
+        self.rules = rules
+        self.global_rules = [rule for rule in rules if rule.location_ids is None]
+        self.rules_by_location: dict[int, list[CompiledRule]] = {}
+        for rule in rules:
+            for location_id in rule.location_ids or ():
+                self.rules_by_location.setdefault(location_id, []).append(rule)
+        self.matcher = KeywordMatcher(keyword for rule in rules for keyword in rule.keywords)
+        self.needs_mentions = any(rule.employee_mentioned or rule.employee_ids for rule in rules)
+
+    def sql_filter(self):
+        # Narrows the candidate reviews to those some rule could match; None means no narrowing applies.
+        clauses = []
+        for rule in self.rules:
+            clause = rule.sql_filter()
+            if clause is None:
+                return None
+            clauses.append(clause)
+        return or_(*clauses) if clauses else models.Review.id.is_(None)
+
+    def evaluate(self, review: models.Review, mentioned_ids: set[int]) -> list[CompiledRule]:
+        candidates = self.rules_by_location.get(review.location_id, []) + self.global_rules
+        if not candidates:
+            return []
+        matched_keywords = self.matcher.match((review.review_text or "").lower()) if self.matcher.pattern else set()
+        return [rule for rule in candidates if rule.matches(review.rating, matched_keywords, mentioned_ids)]
+
+
+def load_rule_set(db: Session) -> RuleSet:
+    rules = db.query(models.AlertRule).filter(models.AlertRule.is_enabled.is_(True)).order_by(models.AlertRule.id).all()
+    compiled = [compile_rule(rule) for rule in rules]
+    return RuleSet([rule for rule in compiled if rule is not None])
@@ -0,0 +1,178 @@
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.alerts import run_negative_review_scan
+from app.db import run_per_shard
+from app.mentions import run_employee_mention_detection
+from app.pipeline import run_review_pipeline
+from app.retention import run_retention
+
+
+def interval_from_env(name: str, default: float) -> float:
+    value = os.getenv(name, "").strip()
+    if not value:
+        return default
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        return default
+
+
+# Each job runs on its own worker thread, so two runs of the same job never overlap.
+# Triggers that arrive mid-run coalesce into one follow-up run; interval 0 disables periodic runs.
+# Jobs sharing a run_lock also never overlap each other.
+class ScheduledJob:
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[Session], int],
+        interval_seconds: float,
+        run_lock: Optional[threading.Lock] = None,
+    ) -> None:
+        self.name = name
+        self.func = func
+        self.interval_seconds = interval_seconds
+        self._run_lock = run_lock or threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.state = "idle"
+        self.pending = False
+        self.run_count = 0
+        self.last_started_at: Optional[datetime] = None
+        self.last_finished_at: Optional[datetime] = None
+        self.last_duration_ms: Optional[float] = None
+        self.last_rows: Optional[int] = None
+        self.last_error: Optional[str] = None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name=f"job-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def trigger(self) -> None:
+        with self._lock:
+            self.pending = True
+        self._wake.set()
+
+    def run_once(self) -> int:
+        with self._run_lock:
+            return self._run()
+
+    def _run(self) -> int:
+        with self._lock:
+            self.state = "running"
+            self.pending = False
+            self.last_started_at = datetime.utcnow()
+        started = time.perf_counter()
+        rows: Optional[int] = None
+        error: Optional[str] = None
+        try:
+            rows = run_per_shard(self.func)
+        except Exception as exc:
+            error = f"{type(exc).__name__}: {exc}"
+            print(f"Job {self.name} failed: {error}")
+        finally:
+            with self._lock:
+                self.state = "idle"
+                self.run_count += 1
+                self.last_finished_at = datetime.utcnow()
+                self.last_duration_ms = round((time.perf_counter() - started) * 1000, 2)
+                self.last_rows = rows
+                self.last_error = error
+        return rows or 0
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            timeout = self.interval_seconds if self.interval_seconds > 0 else None
+            self._wake.wait(timeout)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            self.run_once()
+
+    def status(self) -> dict[str, object]:
+        with self._lock:
+            return {
+                "name": self.name,
+                "state": self.state,
+                "pending": self.pending,
+                "interval_seconds": self.interval_seconds,
+                "run_count": self.run_count,
+                "last_started_at": self.last_started_at.isoformat() if self.last_started_at else None,
+                "last_finished_at": self.last_finished_at.isoformat() if self.last_finished_at else None,
+                "last_duration_ms": self.last_duration_ms,
+                "last_rows": self.last_rows,
+                "last_error": self.last_error,
+            }
+
+
+JOB_MENTIONS = "mentions"
+JOB_ALERTS = "alerts"
+JOB_PIPELINE = "pipeline"
+JOB_RETENTION = "retention"
+
+# Full scans and the import pipeline write the same mention and alert rows.
+scan_lock = threading.Lock()
+
+jobs: dict[str, ScheduledJob] = {
+    JOB_MENTIONS: ScheduledJob(
+        JOB_MENTIONS,
+        run_employee_mention_detection,
+        interval_from_env("MENTION_SCAN_INTERVAL_SECONDS", 300),
+        scan_lock,
+    ),
+    JOB_ALERTS: ScheduledJob(
+        JOB_ALERTS,
+        run_negative_review_scan,
+        interval_from_env("ALERT_SCAN_INTERVAL_SECONDS", 300),
+        scan_lock,
+    ),
+    JOB_PIPELINE: ScheduledJob(
+        JOB_PIPELINE,
+        run_review_pipeline,
+        interval_from_env("PIPELINE_POLL_SECONDS", 2),
+        scan_lock,
+    ),
+    # Off by default; deletes run in small batches so it does not need the scan lock.
+    JOB_RETENTION: ScheduledJob(
+        JOB_RETENTION,
+        run_retention,
+        interval_from_env("RETENTION_INTERVAL_SECONDS", 0),
+    ),
+}
+
+
+def start_scheduler() -> None:
+    for job in jobs.values():
+        job.start()
+
+
+def stop_scheduler() -> None:
+    for job in jobs.values():
+        job.stop()
+
+
+def enqueue(name: str) -> dict[str, object]:
+    job = jobs[name]
+    job.trigger()
+    return job.status()
+
+
+def scheduler_status() -> list[dict[str, object]]:
+    return [job.status() for job in jobs.values()]
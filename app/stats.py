@@ -0,0 +1,51 @@
+from typing import Optional
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from app import models
+
+
+def review_summary(db: Session, review_filters: list, days: Optional[list[str]] = None) -> dict[str, object]:
+    # Sums rather than averages, so summaries from several shards can be merged exactly.
+    totals = (
+        db.query(
+            func.count(models.Review.id).label("total"),
+            func.sum(models.Review.rating).label("rating_sum"),
+            func.sum(case((models.Review.rating <= 2, 1), else_=0)).label("negative"),
+            func.sum(case((models.Review.rating >= 3, 1), else_=0)).label("positive"),
+        )
+        .filter(*review_filters)
+        .one()
+    )
+    day_column = func.date(models.Review.created_at)
+    by_day_query = db.query(day_column.label("day"), func.count(models.Review.id).label("count")).filter(
+        *review_filters
+    )
+    if days is not None:
+        # Only these days' counts, e.g. the days a pipeline batch touched.
+        by_day_query = by_day_query.filter(day_column.in_(days))
+    by_day = by_day_query.group_by(day_column).all()
+    return {
+        "total": totals.total or 0,
+        "rating_sum": float(totals.rating_sum or 0),
+        "negative": totals.negative or 0,
+        "positive": totals.positive or 0,
+        "by_day": {row.day: row.count for row in by_day},
+    }
+
+
+def merge_review_summaries(summaries: list[dict[str, object]]) -> dict[str, object]:
+    total = sum(summary["total"] for summary in summaries)
+    rating_sum = sum(summary["rating_sum"] for summary in summaries)
+    by_day: dict[str, int] = {}
+    for summary in summaries:
+        for day, count in summary["by_day"].items():
+            by_day[day] = by_day.get(day, 0) + count
+    return {
+        "total_reviews": total,
+        "average_rating": round(rating_sum / total, 2) if total else 0,
+        "negative_reviews": sum(summary["negative"] for summary in summaries),
+        "positive_reviews": sum(summary["positive"] for summary in summaries),
+        "reviews_by_day": [{"day": day, "count": by_day[day]} for day in sorted(by_day, reverse=True)],
+    }
@@ -0,0 +1,161 @@
+import argparse
+import csv
+import json
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+
+FIRST_NAMES = [
+    "Jamie", "Priya", "Daniel", "Morgan", "Alex", "Jordan", "Taylor", "Casey", "Riley", "Avery",
+    "Sam", "Chris", "Pat", "Drew", "Cameron", "Quinn", "Reese", "Dana", "Robin", "Kelly",
+    "Maria", "Wei", "Aisha", "Omar", "Sofia", "Lucas", "Noah", "Emma", "Olivia", "Liam",
+    "Mateo", "Hana", "Yusuf", "Ines", "Arjun", "Mei", "Kofi", "Zara", "Ivan", "Leila",
+    "Diego", "Amara", "Kenji", "Nadia", "Tomas", "Elena", "Rahul", "Chloe", "Marcus", "Fatima",
+]
+LAST_NAMES = [
+    "Carter", "Nguyen", "Shah", "Kim", "Diaz", "Johnson", "Lee", "Patel", "Smith", "Brown",
+    "Garcia", "Martin", "Chen", "Wilson", "Singh", "Lopez", "Clark", "Lewis", "Walker", "Young",
+    "Allen", "King", "Wright", "Scott", "Green", "Baker", "Adams", "Nelson", "Hill", "Campbell",
+    "Mitchell", "Roberts", "Turner", "Phillips", "Evans", "Collins", "Stewart", "Morris", "Rogers", "Reed",
+    "Cook", "Morgan", "Bell", "Murphy", "Bailey", "Rivera", "Cooper", "Richardson", "Cox", "Howard",
+    "Ward", "Torres", "Peterson", "Gray", "Ramirez", "James", "Watson", "Brooks", "Kelly", "Sanders",
+    "Price", "Bennett", "Wood", "Barnes", "Ross", "Henderson", "Coleman", "Jenkins", "Perry", "Powell",
+    "Long", "Patterson", "Hughes", "Flores", "Washington", "Butler", "Simmons", "Foster", "Gonzales", "Bryant",
+    "Alexander", "Russell", "Griffin", "Hayes", "Myers", "Ford", "Hamilton", "Graham", "Sullivan", "Wallace",
+    "Woods", "Cole", "West", "Jordan", "Owens", "Reynolds", "Fisher", "Ellis", "Harrison", "Gibson",
+]
+POSITIVE_TEMPLATES = [
+    "{name} made everything smooth. Great service from start to finish.",
+    "{name} explained the options clearly and helped us pick the right setup.",
+    "Installation was quick and tidy, thanks to {name}.",
+    "Very happy with the panels. {name} followed up quickly after install.",
+    "Friendly crew and fair pricing. {name} answered every question.",
+]
+NEGATIVE_TEMPLATES = [
+    "{name} promised a fix but we still had to call back twice.",
+    "Billing details were wrong after the first call and {name} never replied.",
+    "Very disappointed. The install was delayed three times and {name} was rude.",
+    "Slow response from support. {name} did not show up for the appointment.",
+]
+FILLER_TEXT = [
+    "The monitoring app works well and the savings are already visible.",
+    "Paperwork took longer than expected but the result is good.",
+    "Crew left the site clean and the system has run without issues.",
+    "Scheduling was confusing and nobody called to confirm the visit.",
+]
+
+# Presets used by the benchmark harness: reviews, employees, locations.
+SCALES = {
+    "small": (10_000, 10, 2),
+    "medium": (100_000, 500, 10),
+    "large": (1_000_000, 5_000, 50),
+}
+
+
+def generate_employees(count: int, locations: int, rng: random.Random) -> list[dict[str, str]]:
+    names = [f"{first} {last}" for last in LAST_NAMES for first in FIRST_NAMES]
+    if count > len(names):
+        raise ValueError(f"At most {len(names)} synthetic employees are supported.")
+    rng.shuffle(names)
+    return [
+        {
+            "full_name": name,
+            "location_id": str(index % locations + 1),
+            "active": "false" if rng.random() < 0.05 else "true",
+        }
+        for index, name in enumerate(names[:count])
+    ]
+
+
+def mention_for(employee_name: str, rng: random.Random) -> str:
+    roll = rng.random()
+    if roll < 0.6:
+        return employee_name
+    if roll < 0.9:
+        return employee_name.split()[0]
+    return "the technician"
+
+
+def generate_reviews(
+    count: int,
+    employees: list[dict[str, str]],
+    locations: int,
+    rng: random.Random,
+    mention_rate: float = 0.4,
+    negative_rate: float = 0.15,
+) -> list[dict[str, object]]:
+    start = datetime(2024, 1, 1)
+    span_minutes = 2 * 365 * 24 * 60
+    reviews = []
+    for index in range(count):
+        negative = rng.random() < negative_rate
+        rating = rng.choice([1, 2]) if negative else rng.choice([3, 4, 5, 5])
+        if employees and rng.random() < mention_rate:
+            name = mention_for(rng.choice(employees)["full_name"], rng)
+            templates = NEGATIVE_TEMPLATES if negative else POSITIVE_TEMPLATES
+            text = rng.choice(templates).format(name=name)
+        else:
+            text = rng.choice(FILLER_TEXT)
+        created_at = start + timedelta(minutes=rng.randrange(span_minutes))
+        reviews.append(
+            {
+                "google_review_id": f"syn_{index:08d}",
+                "reviewer_name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                "rating": rating,
+                "review_text": text,
+                "created_at": created_at.isoformat(timespec="seconds"),
+                "location_id": index % locations + 1,
+            }
+        )
+    return reviews
+
+
+def write_dataset(
+    out_dir: Path,
+    reviews: int,
+    employees: int,
+    locations: int,
+    seed: int = 42,
+    mention_rate: float = 0.4,
+) -> tuple[Path, Path]:
+    rng = random.Random(seed)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    employee_rows = generate_employees(employees, locations, rng)
+    review_rows = generate_reviews(reviews, employee_rows, locations, rng, mention_rate=mention_rate)
+
+    employees_path = out_dir / "employees.csv"
+    with employees_path.open("w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["full_name", "location_id", "active"])
+        writer.writeheader()
+        writer.writerows(employee_rows)
+
+    reviews_path = out_dir / "reviews.json"
+    reviews_path.write_text(json.dumps(review_rows), encoding="utf-8")
+    return reviews_path, employees_path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate synthetic reviews and employees.")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--reviews", type=int, help="Override the preset review count.")
+    parser.add_argument("--employees", type=int, help="Override the preset employee count.")
+    parser.add_argument("--locations", type=int, help="Override the preset location count.")
+    parser.add_argument("--mention-rate", type=float, default=0.4)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default="bench_data")
+    args = parser.parse_args()
+
+    reviews, employees, locations = SCALES[args.scale]
+    reviews_path, employees_path = write_dataset(
+        Path(args.out),
+        reviews=args.reviews or reviews,
+        employees=args.employees or employees,
+        locations=args.locations or locations,
+        seed=args.seed,
+        mention_rate=args.mention_rate,
+    )
+    print(f"Wrote {reviews_path} and {employees_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+
+from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+from markupsafe import Markup
+
+from app.http_cache import TEMPLATE_DIR
+
+
+def fragment_cache_size() -> int:
+    try:
+        return max(int(os.getenv("FRAGMENT_CACHE_SIZE", "20000")), 0)
+    except ValueError:
+        return 20000
+
+
+class FragmentCache:
+    # Bounded LRU of rendered row markup, shared by every request in the process.
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, Markup] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Markup]:
+        with self._lock:
+            markup = self._entries.get(key)
+            if markup is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return markup
+
+    def put(self, key: Hashable, markup: Markup) -> None:
+        if self.max_entries == 0:
+            return
+        with self._lock:
+            self._entries[key] = markup
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+fragment_cache = FragmentCache(fragment_cache_size())
+
+
+def cache_fragment(kind: str, row_id: int, *version: Hashable, caller: Callable[[], str]) -> Markup:
+    # {% call cache_fragment("review", review.id, review.rating, ...) %}<tr>...</tr>{% endcall %}
+    # The version values must cover everything the block renders; a changed value is a new key.
+    key = (kind, row_id, version)
+    markup = fragment_cache.get(key)
+    if markup is None:
+        markup = Markup(caller())
+        fragment_cache.put(key, markup)
+    return markup
+
+
+def build_templates() -> Jinja2Templates:
+    # Compiled templates are written to TEMPLATE_CACHE_DIR (default: the system temp dir), so
+    # every worker after the first loads bytecode instead of parsing the source again.
+    cache_dir = os.getenv("TEMPLATE_CACHE_DIR") or None
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+    env = Environment(
+        loader=FileSystemLoader(TEMPLATE_DIR),
+        autoescape=True,
+        bytecode_cache=FileSystemBytecodeCache(cache_dir),
+    )
+    env.globals["cache_fragment"] = cache_fragment
+    return Jinja2Templates(env=env)
@@ -0,0 +1,78 @@
+from app import models
+from app.mentions import RosterIndex, detect_mentions
+
+
+def make_roster(*full_names: str) -> RosterIndex:
+    return RosterIndex(
+        [models.Employee(id=index, location_id=1, full_name=name) for index, name in enumerate(full_names, start=1)]
+    )
+
+
+def test_fuzzy_match_ignores_word_extending_a_short_name():
+    roster = make_roster("Sam Lee")
+
+    assert detect_mentions(roster, "Same day install, no complaints.") == []
+
+
+def test_sentence_initial_nickname_that_is_a_word_goes_to_triage():
+    roster = make_roster("William Hart")
+
+    [(employee_id, ambiguous, match)] = detect_mentions(roster, "Bill was higher than quoted.")
+
+    assert employee_id is None
+    assert ambiguous is True
+    assert match.mention_text == "Bill"
+
+
+def test_sentence_initial_nickname_resolves():
+    roster = make_roster("Daniel Park")
+
+    [(employee_id, ambiguous, match)] = detect_mentions(roster, "Dan was great.")
+
+    assert (employee_id, ambiguous) == (1, False)
+    assert match.mention_text == "Dan"
+
+
+def test_nickname_that_is_a_word_resolves_inside_sentence():
+    roster = make_roster("William Hart")
+
+    [(employee_id, ambiguous, _)] = detect_mentions(roster, "Our installer Bill was on time.")
+
+    assert (employee_id, ambiguous) == (1, False)
+
+
+def test_nickname_inside_sentence_resolves():
+    roster = make_roster("Daniel Park")
+
+    [(employee_id, ambiguous, match)] = detect_mentions(roster, "Thanks to Dan for the quick fix.")
+
+    assert (employee_id, ambiguous) == (1, False)
+    assert match.confidence == 0.8
+
+
+def test_misspelled_first_name_resolves():
+    roster = make_roster("Priya Shah")
+
+    [(employee_id, ambiguous, match)] = detect_mentions(roster, "Pria was great.")
+
+    assert (employee_id, ambiguous) == (1, False)
+    assert match.mention_text == "Pria"
+    assert 0.6 < match.confidence < 0.75
+
+
+def test_last_initial_picks_between_shared_first_names():
+    roster = make_roster("Jamie Cole", "Jamie Ross")
+
+    [(employee_id, ambiguous, match)] = detect_mentions(roster, "Ask for Jamie C. next time.")
+
+    assert (employee_id, ambiguous) == (1, False)
+    assert match.mention_text == "Jamie C."
+    assert match.confidence == 0.95
+
+
+def test_shared_first_name_without_initial_is_ambiguous():
+    roster = make_roster("Jamie Cole", "Jamie Ross")
+
+    assert [(employee_id, ambiguous) for employee_id, ambiguous, _ in detect_mentions(roster, "Jamie helped.")] == [
+        (None, True)
+    ]
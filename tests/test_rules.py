@@ -0,0 +1,95 @@
+import json
+
+import pytest
+
+from app import models
+from app.rules import KeywordMatcher, compile_rule
+
+
+def make_rule(condition, rule_id: int = 1, location_id: int = 1) -> models.AlertRule:
+    return models.AlertRule(
+        id=rule_id,
+        location_id=location_id,
+        name="test_rule",
+        condition_json=json.dumps(condition),
+        is_enabled=True,
+    )
+
+
+def test_compile_rule_reads_all_conditions():
+    rule = compile_rule(
+        make_rule(
+            {
+                "rating_lte": 2,
+                "keywords_any": ["Rude ", "slow  service"],
+                "employee_mentioned": [3, 7],
+                "location_ids": [1, 2],
+            }
+        )
+    )
+    assert rule is not None
+    assert rule.rating_lte == 2.0
+    assert rule.keywords == {"rude", "slow service"}
+    assert rule.employee_ids == {3, 7}
+    assert rule.location_ids == {1, 2}
+
+
+def test_compile_rule_defaults_to_rule_location():
+    rule = compile_rule(make_rule({"rating_lte": 2}, location_id=4))
+    assert rule.location_ids == {4}
+    assert compile_rule(make_rule({"rating_lte": 2, "all_locations": True})).location_ids is None
+
+
+@pytest.mark.parametrize(
+    "condition",
+    [
+        {"keywords_any": [5]},
+        {"keywords_any": "rude"},
+        {"rating_lte": "two"},
+        {"rating_gte": True},
+        {"location_ids": ["a"]},
+        {"employee_mentioned": "yes"},
+        {"employee_mentioned": [1, "2"]},
+        {"all_locations": "yes"},
+    ],
+)
+def test_compile_rule_skips_invalid_types(condition, capsys):
+    assert compile_rule(make_rule(condition)) is None
+    assert "invalid condition_json" in capsys.readouterr().out
+
+
+def test_compile_rule_skips_invalid_json(capsys):
+    rule = make_rule({})
+    rule.condition_json = "{not json"
+    assert compile_rule(rule) is None
+    assert "invalid condition_json" in capsys.readouterr().out
+
+
+def test_compile_rule_skips_rules_without_conditions(capsys):
+    assert compile_rule(make_rule({"unknown": 1})) is None
+    assert "no usable conditions" in capsys.readouterr().out
+
+
+def test_keyword_matcher_reports_overlapping_keywords():
+    matcher = KeywordMatcher(["slow service", "service charge"])
+    assert matcher.match("slow service charge") == {"slow service", "service charge"}
+
+
+def test_keyword_matcher_reports_nested_keywords():
+    matcher = KeywordMatcher(["slow", "slow service", "service"])
+    assert matcher.match("very slow service today") == {"slow", "slow service", "service"}
+
+
+def test_keyword_matcher_respects_word_boundaries():
+    matcher = KeywordMatcher(["rude", "late"])
+    assert matcher.match("a crude joke, translated") == set()
+    assert matcher.match("rude and late") == {"rude", "late"}
+
+
+def test_keyword_matcher_allows_any_whitespace_inside_phrases():
+    matcher = KeywordMatcher(["slow service"])
+    assert matcher.match("slow\n  service") == {"slow service"}
+
+
+def test_keyword_matcher_without_keywords():
+    assert KeywordMatcher([]).match("anything") == set()